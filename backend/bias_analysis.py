@@ -1,27 +1,72 @@
 from typing import Dict, List, Tuple
-import nltk
+import atexit
+import copy
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import chain
 from nltk.sentiment import SentimentIntensityAnalyzer
 from nltk.tokenize import sent_tokenize
-import json
-import os
+import re
+import numpy as np
+from .nltk_utils import ensure_nltk
 from .snowflake_integration import SnowflakeManager
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to a compiled regex
+    ahocorasick = None
+
+_VADER_TOKEN_RE = re.compile(r"[\w']+")
+
+# Bias indicator vocabulary, built once at import and shared by all detectors
+_BIAS_INDICATORS = {
+    'emotional_language': frozenset({
+        'outrageous', 'shocking', 'horrible', 'terrible',
+        'amazing', 'incredible', 'wonderful', 'fantastic'
+    }),
+    'loaded_words': frozenset({
+        'radical', 'extremist', 'terrorist', 'socialist',
+        'conspiracy', 'propaganda', 'regime', 'elite'
+    }),
+    'partisan_terms': frozenset({
+        'leftist', 'rightist', 'liberal', 'conservative',
+        'democrat', 'republican', 'progressive', 'traditionalist'
+    })
+}
+
+# Short names used in the indicator counts
+_INDICATOR_KEYS = {
+    'emotional_language': 'emotional',
+    'loaded_words': 'loaded',
+    'partisan_terms': 'partisan'
+}
+
+# Flat word -> count key lookup for single-pass counting
+_WORD_TO_CAT = {
+    word: _INDICATOR_KEYS[category]
+    for category, words in _BIAS_INDICATORS.items()
+    for word in words
+}
+
+@functools.lru_cache(maxsize=1)
+def _get_sia() -> SentimentIntensityAnalyzer:
+    """Return a shared VADER analyzer, downloading the lexicon only if missing"""
+    ensure_nltk('sentiment/vader_lexicon.zip', 'vader_lexicon')
+    return SentimentIntensityAnalyzer()
+
+@functools.lru_cache(maxsize=1)
+def _vader_lexicon_arrays() -> Tuple[np.ndarray, np.ndarray]:
+    """Return the VADER lexicon as sorted token and valence arrays"""
+    lexicon = _get_sia().lexicon
+    tokens = np.array(sorted(lexicon))
+    valences = np.array([lexicon[token] for token in tokens], dtype=np.float64)
+    return tokens, valences
+
 class BiasDetector:
-    def __init__(self):
-        # Download required NLTK data
-        nltk.download('vader_lexicon')
-        
-        # Initialize sentiment analyzer
-        self.sia = SentimentIntensityAnalyzer()
-        
-        # Initialize Snowflake manager
-        self.snowflake = SnowflakeManager()
-        
-        # Load bias indicators
-        self._load_bias_indicators()
-        
-        # Define system prompt for Mistral
-        self.system_prompt = """You are an expert in media bias analysis. Analyze the given article and related sources for bias.
+    # System prompt for Mistral, shared by every instance
+    system_prompt = """You are an expert in media bias analysis. Analyze the given article and related sources for bias.
         Provide a structured analysis in JSON format with the following fields:
         {
             "bias_score": float (-1.0 to 1.0, where -1 is far left and 1 is far right),
@@ -42,55 +87,146 @@ class BiasDetector:
         4. Historical context and perspective
         """
     
+    # Texts shorter than this are not worth running the pipeline on
+    MIN_TEXT_LENGTH = 32
+    
+    # Number of per-text analysis results kept for repeated articles
+    RESULTS_CACHE_SIZE = 1024
+    
+    # Bias indicator tables; the matcher is compiled once on first use
+    bias_indicators = _BIAS_INDICATORS
+    _indicator_keys = _INDICATOR_KEYS
+    _word_to_cat = _WORD_TO_CAT
+    _min_indicator_length = min(map(len, _WORD_TO_CAT))
+    _indicator_matcher = None
+    
+    def __init__(self):
+        # Initialize sentiment analyzer (lexicon is loaded once per process)
+        self.sia = _get_sia()
+        
+        # Initialize Snowflake manager
+        self.snowflake = SnowflakeManager()
+        
+        # Load bias indicators
+        self._load_bias_indicators()
+        
+        # LRU of text-derived results keyed on a hash of the article text
+        self._results_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def close(self):
+        """Release the Snowflake connection"""
+        self.snowflake.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def _load_bias_indicators(self):
-        """Load bias indicators from a predefined list"""
-        self.bias_indicators = {
-            'emotional_language': [
-                'outrageous', 'shocking', 'horrible', 'terrible',
-                'amazing', 'incredible', 'wonderful', 'fantastic'
-            ],
-            'loaded_words': [
-                'radical', 'extremist', 'terrorist', 'socialist',
-                'conspiracy', 'propaganda', 'regime', 'elite'
-            ],
-            'partisan_terms': [
-                'leftist', 'rightist', 'liberal', 'conservative',
-                'democrat', 'republican', 'progressive', 'traditionalist'
-            ]
-        }
+        """Compile the shared bias indicator matcher on first use"""
+        cls = type(self)
+        if cls._indicator_matcher is None:
+            cls._indicator_matcher = cls._build_indicator_matcher()
+    
+    @classmethod
+    def _build_indicator_matcher(cls):
+        """Compile every bias indicator into a single-pass matcher"""
+        if ahocorasick is None:
+            # Longest words first so a shorter indicator never shadows a longer one
+            words = sorted(cls._word_to_cat, key=len, reverse=True)
+            return re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b')
+        
+        automaton = ahocorasick.Automaton()
+        for word, key in cls._word_to_cat.items():
+            automaton.add_word(word, (key, len(word)))
+        automaton.make_automaton()
+        return automaton
+    
+    def _count_indicators(self, text_lower: str) -> Dict[str, int]:
+        """Count whole-word bias indicator occurrences in one scan of the text"""
+        counts = dict.fromkeys(self._indicator_keys.values(), 0)
+        if len(text_lower) < self._min_indicator_length:
+            return counts
+        
+        if ahocorasick is not None:
+            last = len(text_lower) - 1
+            for end, (key, length) in self._indicator_matcher.iter(text_lower):
+                start = end - length + 1
+                # Only count matches that sit on word boundaries
+                if start > 0 and (text_lower[start - 1].isalnum() or text_lower[start - 1] == '_'):
+                    continue
+                if end < last and (text_lower[end + 1].isalnum() or text_lower[end + 1] == '_'):
+                    continue
+                counts[key] += 1
+        else:
+            # findall runs in C and only surfaces actual indicator hits
+            word_to_cat = self._word_to_cat
+            for word in self._indicator_matcher.findall(text_lower):
+                counts[word_to_cat[word]] += 1
+        
+        return counts
     
     def _analyze_sentiment(self, text: str) -> Dict[str, float]:
         """Analyze the sentiment of the text"""
         scores = self.sia.polarity_scores(text)
         
-        # Determine overall sentiment
-        if scores['compound'] >= 0.05:
-            sentiment = 'positive'
-        elif scores['compound'] <= -0.05:
-            sentiment = 'negative'
-        else:
-            sentiment = 'neutral'
-        
         return {
-            'sentiment': sentiment,
+            'sentiment': self._get_sentiment_label(scores['compound']),
             'scores': scores
         }
     
-    def _analyze_language_patterns(self, text: str) -> Dict:
-        """Analyze language patterns for bias indicators"""
-        text_lower = text.lower()
-        words = text_lower.split()
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        """Approximate VADER compound scores for a corpus in one vectorized pass
+        
+        Applies lexicon valences, negation of the three preceding tokens and
+        '!'/'?' emphasis, but skips VADER's booster, caps and 'but' rules, so
+        scores are close to, not identical with, polarity_scores.
+        """
+        if not texts:
+            return np.zeros(0)
+        
+        lex_tokens, lex_valences = _vader_lexicon_arrays()
+        constants = self.sia.constants
+        
+        token_lists = [_VADER_TOKEN_RE.findall(text.lower()) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(texts))
+        sums = np.zeros(len(texts))
         
+        if lengths.sum():
+            tokens = np.array(list(chain.from_iterable(token_lists)))
+            doc_ids = np.repeat(np.arange(len(texts)), lengths)
+            
+            # Lexicon lookup via binary search on the sorted token array
+            idx = np.minimum(np.searchsorted(lex_tokens, tokens), len(lex_tokens) - 1)
+            valences = np.where(lex_tokens[idx] == tokens, lex_valences[idx], 0.0)
+            
+            # Negate valences preceded by a negation within the same document
+            negations = np.isin(tokens, list(constants.NEGATE))
+            negated = np.zeros(len(tokens), dtype=bool)
+            for offset in (1, 2, 3):
+                negated[offset:] |= negations[:-offset] & (doc_ids[offset:] == doc_ids[:-offset])
+            valences = np.where(negated, valences * constants.N_SCALAR, valences)
+            
+            sums = np.bincount(doc_ids, weights=valences, minlength=len(texts))
+        
+        # Punctuation emphasis, capped as in VADER
+        exclamations = np.fromiter((min(text.count('!'), 4) for text in texts), dtype=np.float64, count=len(texts))
+        questions = np.fromiter((text.count('?') for text in texts), dtype=np.float64, count=len(texts))
+        question_amp = np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0.0)
+        emphasis = exclamations * 0.292 + question_amp
+        sums = sums + np.sign(sums) * emphasis
+        
+        return sums / np.sqrt(sums * sums + 15)
+    
+    def _analyze_language_patterns(self, text_lower: str, total_words: int) -> Dict:
+        """Analyze language patterns for bias indicators in pre-lowercased text"""
         # Count bias indicators
-        indicator_counts = {
-            'emotional': sum(1 for word in words if word in self.bias_indicators['emotional_language']),
-            'loaded': sum(1 for word in words if word in self.bias_indicators['loaded_words']),
-            'partisan': sum(1 for word in words if word in self.bias_indicators['partisan_terms'])
-        }
+        indicator_counts = self._count_indicators(text_lower)
         
         # Calculate emotional language score
         total_bias_words = sum(indicator_counts.values())
-        total_words = len(words)
         emotional_score = total_bias_words / total_words if total_words > 0 else 0
         
         return {
@@ -106,62 +242,89 @@ class BiasDetector:
         try:
             # Get article text
             article_text = article_data.get('text', '')
-            if not article_text:
+            if len(article_text.strip()) < self.MIN_TEXT_LENGTH:
                 return self._get_default_results()
             
-            # Perform sentiment analysis
-            sentiment_scores = self.sia.polarity_scores(article_text)
-            
-            # Analyze language patterns
-            language_analysis = self._analyze_language_patterns(article_text)
-            
-            # Calculate bias score components
-            sentiment_bias = sentiment_scores['compound'] * 0.3  # Weight sentiment less
-            language_bias = language_analysis['emotional_score'] * 0.7  # Weight language patterns more
-            
-            # Combine for final bias score
-            bias_score = max(-1.0, min(1.0, sentiment_bias + language_bias))
-            
-            # Determine political leaning
-            political_leaning = self._get_political_leaning(bias_score, language_analysis['indicator_counts'])
-            
-            # Generate key findings
-            key_findings = []
-            if abs(sentiment_scores['compound']) > 0.2:
-                key_findings.append(
-                    f"Strong {'negative' if sentiment_scores['compound'] < 0 else 'positive'} tone detected"
-                )
-            
-            if language_analysis['emotional_score'] > 0.1:
-                key_findings.append("Significant use of emotional language")
-            
-            # Generate recommendations
-            recommendations = []
-            if abs(bias_score) > 0.3:
-                recommendations.append("Consider consulting sources with different perspectives")
-            
-            if language_analysis['emotional_score'] > 0.15:
-                recommendations.append("Be aware of emotional language influence")
-            
-            return {
-                "bias_score": bias_score,
-                "political_leaning": political_leaning,
-                "sentiment": self._get_sentiment_label(sentiment_scores['compound']),
-                "sentiment_scores": sentiment_scores,
-                "bias_indicators": language_analysis['indicator_counts'],
-                "key_findings": key_findings,
-                "recommendations": recommendations
-            }
+            # The analysis depends only on the text and is memoized; callers
+            # get their own copy so mutating it can't touch the cache
+            return copy.deepcopy(self._analyze_text(article_text))
             
         except Exception as e:
             print(f"Error in bias analysis: {str(e)}")
             return self._get_default_results()
-            
-    def _normalize_sentiment(self, compound_score: float) -> float:
-        """Convert VADER compound score to bias score range"""
-        return compound_score * 0.5  # Scale to [-0.5, 0.5] range
+    
+    def _analyze_text(self, article_text: str) -> Dict:
+        """Run the text-only analyses, reusing results for previously seen text"""
+        # Only local, deterministic analyses belong here: a failure raises
+        # instead of returning defaults, so no fallback is ever cached
+        key = hashlib.blake2b(article_text.encode(), digest_size=16).digest()
+        with self._cache_lock:
+            cached = self._results_cache.get(key)
+            if cached is not None:
+                self._results_cache.move_to_end(key)
+                return cached
+        
+        # Normalize the text once and share it across analyses
+        text_lower = article_text.lower()
+        total_words = len(article_text.split())
+        
+        # Perform sentiment analysis (VADER runs exactly once per article)
+        sentiment = self._analyze_sentiment(article_text)
+        sentiment_scores = sentiment['scores']
+        
+        # Analyze language patterns
+        language_analysis = self._analyze_language_patterns(text_lower, total_words)
+        
+        # Calculate bias score components
+        sentiment_bias = sentiment_scores['compound'] * 0.3  # Weight sentiment less
+        language_bias = language_analysis['emotional_score'] * 0.7  # Weight language patterns more
+        
+        # Combine for final bias score
+        bias_score = max(-1.0, min(1.0, sentiment_bias + language_bias))
+        
+        # Determine political leaning
+        political_leaning = self._get_political_leaning(bias_score, language_analysis['indicator_counts']['partisan'])
+        
+        # Generate key findings
+        key_findings = []
+        if abs(sentiment_scores['compound']) > 0.2:
+            key_findings.append(
+                f"Strong {'negative' if sentiment_scores['compound'] < 0 else 'positive'} tone detected"
+            )
+        
+        if language_analysis['emotional_score'] > 0.1:
+            key_findings.append("Significant use of emotional language")
+        
+        # Generate recommendations
+        recommendations = []
+        if abs(bias_score) > 0.3:
+            recommendations.append("Consider consulting sources with different perspectives")
+        
+        if language_analysis['emotional_score'] > 0.15:
+            recommendations.append("Be aware of emotional language influence")
+        
+        results = {
+            "bias_score": bias_score,
+            "political_leaning": political_leaning,
+            "sentiment": sentiment['sentiment'],
+            "sentiment_scores": sentiment_scores,
+            "bias_indicators": language_analysis['indicator_counts'],
+            "key_findings": key_findings,
+            "recommendations": recommendations
+        }
         
-    def _get_political_leaning(self, bias_score: float, indicator_counts: Dict) -> str:
+        with self._cache_lock:
+            self._results_cache[key] = results
+            if len(self._results_cache) > self.RESULTS_CACHE_SIZE:
+                self._results_cache.popitem(last=False)
+        return results
+        
+    def analyze_batch(self, articles: List[Dict]) -> List[Dict]:
+        """Analyze several articles, returning results in input order"""
+        # analyze() is CPU-bound pure Python under the GIL, so threads would not help
+        return [self.analyze(article) for article in articles]
+            
+    def _get_political_leaning(self, bias_score: float, partisan_count: int) -> str:
         """Determine political leaning based on bias score and language patterns"""
         # Base category on bias score
         if bias_score <= -0.6:
@@ -176,7 +339,6 @@ class BiasDetector:
             base_category = "far right"
         
         # Adjust based on partisan language usage
-        partisan_count = indicator_counts.get('partisan', 0)
         if partisan_count > 5:  # High partisan language usage
             if bias_score < 0:
                 return "far left"
@@ -185,57 +347,6 @@ class BiasDetector:
         
         return base_category
         
-    def _generate_key_findings(self, bias_components: Dict, language_patterns: Dict,
-                             source_analysis: Dict, fact_checks: Dict) -> List[str]:
-        """Generate key insights from analysis results"""
-        findings = []
-        
-        # Add bias-related findings
-        if abs(bias_components['sentiment']) > 0.3:
-            findings.append(
-                f"Strong {'negative' if bias_components['sentiment'] < 0 else 'positive'} "
-                "emotional tone detected in the writing"
-            )
-            
-        if language_patterns['loaded_words_count'] > 5:
-            findings.append(
-                "Significant use of loaded language and emotional terms"
-            )
-            
-        if source_analysis['diversity'] < 0.3:
-            findings.append(
-                "Limited perspective diversity in source material"
-            )
-            
-        if fact_checks['accuracy'] < 0.7:
-            findings.append(
-                "Several factual claims require additional verification"
-            )
-            
-        return findings
-        
-    def _generate_recommendations(self, bias_score: float, source_analysis: Dict,
-                                fact_checks: Dict) -> List[str]:
-        """Generate recommendations for balanced consumption"""
-        recommendations = []
-        
-        if abs(bias_score) > 0.4:
-            recommendations.append(
-                "Consider consulting sources with different political perspectives"
-            )
-            
-        if source_analysis['credibility'] < 0.6:
-            recommendations.append(
-                "Verify claims against highly credible news sources"
-            )
-            
-        if fact_checks['accuracy'] < 0.8:
-            recommendations.append(
-                "Cross-reference key facts with official or primary sources"
-            )
-            
-        return recommendations
-        
     def _get_default_results(self) -> Dict:
         """Return default results structure"""
         return {
@@ -257,13 +368,6 @@ class BiasDetector:
         else:
             return "neutral"
     
-    def __del__(self):
-        """Cleanup Snowflake resources"""
-        try:
-            self.snowflake.close()
-        except:
-            pass
-    
     def _analyze_sources(self, article_data: Dict, related_articles: List[Dict]) -> Dict:
         """Analyze sources and their credibility"""
         try:
@@ -420,3 +524,10 @@ class BiasDetector:
             "Historical trends show patterns in public discourse on this issue",
             "Previous related events provide context for current developments"
         ]
+
+@functools.lru_cache(maxsize=1)
+def get_bias_detector() -> BiasDetector:
+    """Return the process-wide BiasDetector, closing its connection at exit"""
+    detector = BiasDetector()
+    atexit.register(detector.close)
+    return detector
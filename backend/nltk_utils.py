@@ -0,0 +1,22 @@
+import functools
+import nltk
+
+@functools.lru_cache(maxsize=None)
+def ensure_nltk(resource: str, package: str) -> None:
+    """Download an NLTK resource once per process, only if it is missing"""
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        nltk.download(package, quiet=True)
+
+@functools.lru_cache(maxsize=8)
+def punkt(language: str = 'english'):
+    """Return a cached Punkt sentence tokenizer for the given language"""
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer
+    except ImportError:
+        # NLTK < 3.8.2 ships the tokenizer as a pickle
+        ensure_nltk('tokenizers/punkt', 'punkt')
+        return nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+    ensure_nltk(f'tokenizers/punkt_tab/{language}/', 'punkt_tab')
+    return PunktTokenizer(language)
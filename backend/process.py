@@ -1,43 +1,118 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-import nltk
-from nltk.tokenize import sent_tokenize
+from .nltk_utils import punkt
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # selectolax is optional; fall back to BeautifulSoup + lxml
+    HTMLParser = None
+
+try:
+    import trafilatura
+except ImportError:  # trafilatura is optional; fall back to the tag heuristics
+    trafilatura = None
+
+# Patterns used by ArticleProcessor._clean_text, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s.,!?-]+')
 
 class ArticleProcessor:
+    # Upper bound on the bytes read from a single article page
+    MAX_CONTENT_BYTES = 2_000_000
+    
+    # Connect and read timeouts (seconds) for article requests
+    REQUEST_TIMEOUT = (5, 15)
+    
+    # Number of processed texts and URLs remembered for repeat submissions
+    CACHE_SIZE = 256
+    
     def __init__(self):
-        # Download required NLTK data
-        nltk.download('punkt')
+        # Load the sentence tokenizer once (NLTK data is downloaded only if missing)
+        self.sentence_tokenizer = punkt()
         
         # Common headers to avoid being blocked
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        
+        # Pooled session so repeated fetches reuse TCP/TLS connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # LRUs of processed texts (by content hash) and URLs (with their ETag)
+        self._text_cache = OrderedDict()
+        self._url_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _cache_get(self, cache: OrderedDict, key):
+        """Return a cached value and mark it recently used"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters
-        text = re.sub(r'[^\w\s.,!?-]', '', text)
+        text = _WHITESPACE_RE.sub(' ', text)
+        # Remove special characters (runs are removed in one match)
+        text = _SPECIAL_CHARS_RE.sub('', text)
         return text.strip()
     
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
+    def _extract_title(self, tree) -> str:
+        """Extract the page title from a selectolax or BeautifulSoup tree"""
+        if isinstance(tree, BeautifulSoup):
+            return tree.title.string if tree.title else ''
+        title = tree.css_first('title')
+        return title.text() if title else ''
+    
+    def _extract_main_content(self, tree) -> str:
         """Extract the main article content from HTML"""
+        if not isinstance(tree, BeautifulSoup):
+            # Same heuristics on a selectolax tree
+            for selector in ('article, main', 'p'):
+                nodes = tree.css(selector)
+                if nodes:
+                    return ' '.join(node.text() for node in nodes)
+            return tree.body.text() if tree.body else tree.text()
+        
         # Try common article content patterns
-        article_tags = soup.find_all(['article', 'main'])
+        article_tags = tree.find_all(['article', 'main'])
         if article_tags:
             return ' '.join(tag.get_text() for tag in article_tags)
         
         # Look for content in paragraphs
-        paragraphs = soup.find_all('p')
+        paragraphs = tree.find_all('p')
         if paragraphs:
             return ' '.join(p.get_text() for p in paragraphs)
         
         # Fallback to body content
-        return soup.get_text()
+        return tree.get_text()
     
     def _get_domain(self, url: str) -> str:
         """Extract the domain name from URL"""
@@ -46,7 +121,7 @@ class ArticleProcessor:
     
     def _summarize_text(self, text: str, max_sentences: int = 3) -> str:
         """Create a brief summary of the article text"""
-        sentences = sent_tokenize(text)
+        sentences = self.sentence_tokenizer.tokenize(text)
         
         if len(sentences) <= max_sentences:
             return text
@@ -58,16 +133,38 @@ class ArticleProcessor:
     def process_url(self, url: str) -> Dict:
         """Process an article from URL"""
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            # Revalidate a previously processed page with its ETag
+            cached = self._cache_get(self._url_cache, url)
+            headers = {'If-None-Match': cached[0]} if cached else None
+            
+            # Stream the page and stop reading at MAX_CONTENT_BYTES
+            with self.session.get(url, headers=headers, stream=True, timeout=self.REQUEST_TIMEOUT) as response:
+                if cached and response.status_code == 304:
+                    return dict(cached[1])
+                response.raise_for_status()
+                etag = response.headers.get('ETag')
+                body = response.raw.read(self.MAX_CONTENT_BYTES, decode_content=True)
+                # Only trust a charset the server declared; otherwise let lxml sniff
+                declared = 'charset=' in response.headers.get('Content-Type', '').lower()
+                encoding = response.encoding if declared else None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Parse with selectolax's C parser when installed, otherwise lxml;
+            # both detect the encoding of the raw bytes themselves
+            if HTMLParser is not None:
+                html = body.decode(encoding, errors='replace') if encoding else body
+                tree = HTMLParser(html, detect_encoding=encoding is None)
+            else:
+                tree = BeautifulSoup(body, 'lxml', from_encoding=encoding)
             
             # Extract title
-            title = soup.title.string if soup.title else ''
+            title = self._extract_title(tree)
             
-            # Extract main content
-            content = self._extract_main_content(soup)
+            # Extract main content, preferring trafilatura's boilerplate removal
+            content = None
+            if trafilatura is not None:
+                content = trafilatura.extract(body, include_comments=False, include_tables=False)
+            if not content:
+                content = self._extract_main_content(tree)
             cleaned_content = self._clean_text(content)
             
             # Create article data
@@ -76,25 +173,40 @@ class ArticleProcessor:
                 'domain': self._get_domain(url),
                 'title': title,
                 'text': cleaned_content,
-                'summary': self._summarize_text(cleaned_content),
-                'html': response.text  # Keep original HTML for potential further processing
+                'summary': self._summarize_text(cleaned_content)
             }
             
-            return article_data
+            if etag:
+                self._cache_put(self._url_cache, url, (etag, article_data))
+            return dict(article_data)
             
         except Exception as e:
             print(f"Error processing URL {url}: {str(e)}")
             return None
     
+    def process_urls(self, urls: List[str], max_workers: int = 16) -> List[Optional[Dict]]:
+        """Process several article URLs concurrently, returning results in input order"""
+        if not urls:
+            return []
+        
+        # Fetches overlap on the pooled session; parsing runs between network waits
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+            return list(executor.map(self.process_url, urls))
+    
     def process_text(self, text: str) -> Dict:
         """Process raw article text"""
-        cleaned_text = self._clean_text(text)
+        key = hashlib.blake2b(text.encode('utf-8', 'ignore'), digest_size=16).digest()
+        cached = self._cache_get(self._text_cache, key)
+        if cached is None:
+            cleaned_text = self._clean_text(text)
+            cached = {
+                'url': None,
+                'domain': None,
+                'title': None,
+                'text': cleaned_text,
+                'summary': self._summarize_text(cleaned_text)
+            }
+            self._cache_put(self._text_cache, key, cached)
         
-        return {
-            'url': None,
-            'domain': None,
-            'title': None,
-            'text': cleaned_text,
-            'summary': self._summarize_text(cleaned_text),
-            'html': None
-        }
+        # Callers fill in url/title/domain, so hand out a copy
+        return dict(cached)
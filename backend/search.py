@@ -1,50 +1,211 @@
 from typing import Dict, List, Optional
+import functools
+import hashlib
 import os
-from datetime import datetime, timedelta
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import TfidfVectorizer
+import threading
+from collections import OrderedDict
 import numpy as np
 from .snowflake_integration import SnowflakeManager
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
-from sentence_transformers import SentenceTransformer
+from .vector_index import top_k_indices
+
+@functools.lru_cache(maxsize=None)
+def get_reranker(model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2'):
+    """Load the cross-encoder reranker once per process"""
+    # Imported here so the torch stack loads only when reranking is enabled
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name)
 
 class NewsSearcher:
+    # Number of queries remembered by the exact and semantic result caches
+    CACHE_SIZE = 1024
+    
+    # Cosine similarity above which a new query reuses a cached result
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+    
+    # Candidates fetched per query when the cross-encoder reranker is enabled
+    RERANK_CANDIDATES = 10
+    
     def __init__(self):
-        """Initialize the news searcher with embedding model and Snowflake connection"""
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        """Initialize the news searcher with a Snowflake connection"""
         self.snowflake = SnowflakeManager()
+        
+        # Optional cross-encoder rerank of the nearest neighbours
+        self.reranker = get_reranker() if os.getenv("VERIFAI_RERANKER", "").lower() in ("1", "true", "yes") else None
+        
+        # Exact tier: normalized-text hash -> (top_k, results)
+        self._exact_cache = OrderedDict()
+        # Semantic tier: ring buffer of unit query embeddings and their results
+        self._cache_keys = None
+        self._cache_vals = [None] * self.CACHE_SIZE
+        self._cache_next = 0
+        self._cache_count = 0
+        self._cache_lock = threading.Lock()
+        self._cache_stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        
+        # Index generation the cached results were computed against
+        self._cache_generation = SnowflakeManager.index_generation
+    
+    def clear_cache(self):
+        """Forget cached search results, e.g. after indexing new articles"""
+        with self._cache_lock:
+            self._clear_cache_locked()
+    
+    def _clear_cache_locked(self):
+        """Empty both cache tiers; caller holds the cache lock"""
+        self._exact_cache.clear()
+        self._cache_vals = [None] * self.CACHE_SIZE
+        self._cache_next = 0
+        self._cache_count = 0
+    
+    def _sync_cache_generation(self) -> int:
+        """Drop cached results computed before the latest indexing, returning the current generation"""
+        generation = SnowflakeManager.index_generation
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                self._clear_cache_locked()
+                self._cache_generation = generation
+        return generation
+    
+    def stats(self) -> Dict:
+        """Return cache hit/miss counts and the number of cached queries"""
+        with self._cache_lock:
+            return dict(self._cache_stats, size=len(self._exact_cache))
     
     def find_related(self, article_data: Dict, top_k: int = 5) -> List[Dict]:
         """Find related articles using semantic search"""
+        return self.find_related_batch([article_data], top_k=top_k)[0]
+    
+    def find_related_batch(self, articles: List[Dict], top_k: int = 5) -> List[List[Dict]]:
+        """Find related articles for several articles with one encode and one search"""
         try:
-            # Extract text from article data
-            text = article_data.get('text', '')
-            if not text:
-                return []
+            related = [[] for _ in articles]
+            generation = self._sync_cache_generation()
             
-            # Search for related articles
-            results = self.snowflake.semantic_search(text, top_k=top_k)
+            # Extract text from article data; empty texts get no results and
+            # exact repeats (ignoring case and spacing) are served from cache
+            pending = {}
+            for i, article in enumerate(articles):
+                text = article.get('text', '')
+                if not text:
+                    continue
+                key = hashlib.blake2b(' '.join(text.lower().split()).encode(), digest_size=16).digest()
+                cached = self._exact_lookup(key, top_k)
+                if cached is not None:
+                    related[i] = cached
+                else:
+                    pending[i] = (key, text)
+            if not pending:
+                return related
+            
+            # Encode the misses together, then reuse near-duplicate queries
+            batch = list(pending)
+            embeddings = self.snowflake.encode_queries([pending[i][1] for i in batch])
+            search_rows = []
+            for row, i in enumerate(batch):
+                cached = self._semantic_lookup(embeddings[row], top_k)
+                if cached is not None:
+                    related[i] = cached
+                else:
+                    search_rows.append(row)
+            if not search_rows:
+                return related
             
-            # Add credibility scores
-            for result in results:
-                result['credibility_score'] = self._calculate_credibility(result)
-                result['final_score'] = (
-                    result['score'] * 0.7 +  # Semantic similarity
-                    result['credibility_score'] * 0.3  # Source credibility
-                )
+            # Search for related articles
+            search_k = max(top_k, self.RERANK_CANDIDATES) if self.reranker is not None else top_k
+            results_batch = self.snowflake.semantic_search_batch(embeddings[search_rows], top_k=search_k)
+            if self.reranker is not None:
+                self._rerank([pending[batch[row]][1] for row in search_rows], results_batch)
+            for row, results in zip(search_rows, results_batch):
+                # Add credibility scores and blend them with relevance as arrays
+                if results:
+                    relevance = np.fromiter((result.get('relevance_score', result['score']) for result in results), dtype=np.float64, count=len(results))
+                    credibility = np.fromiter((self._calculate_credibility(result) for result in results), dtype=np.float64, count=len(results))
+                    final_scores = (
+                        relevance * 0.7 +  # Query relevance
+                        credibility * 0.3  # Source credibility
+                    )
+                    for result, credibility_score, final_score in zip(results, credibility.tolist(), final_scores.tolist()):
+                        result['credibility_score'] = credibility_score
+                        result['final_score'] = final_score
+                    
+                    # Select and sort only the top_k by final score
+                    results = [results[j] for j in top_k_indices(final_scores[None, :], top_k)[0]]
+                
+                i = batch[row]
+                self._cache_store(pending[i][0], embeddings[row], top_k, results, generation)
+                related[i] = [dict(result) for result in results]
             
-            # Sort by final score
-            results.sort(key=lambda x: x['final_score'], reverse=True)
-            return results[:top_k]
+            return related
             
         except Exception as e:
             print(f"Error finding related articles: {str(e)}")
-            return []
+            return [[] for _ in articles]
+    
+    def _rerank(self, query_texts: List[str], results_batch: List[List[Dict]]):
+        """Score every (query, candidate) pair in one cross-encoder pass and blend with similarity"""
+        pairs = [
+            (query_text[:512], (result['metadata'].get('content') or '')[:512])
+            for query_text, results in zip(query_texts, results_batch)
+            for result in results
+        ]
+        if not pairs:
+            return
+        
+        try:
+            logits = self.reranker.predict(pairs, batch_size=32, convert_to_numpy=True, show_progress_bar=False)
+        except Exception as e:
+            print(f"Error reranking related articles: {str(e)}")
+            return
+        
+        # Squash the MS MARCO logits to [0, 1] before mixing with the cosine
+        relevance = 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+        for result, rerank_score in zip((result for results in results_batch for result in results), relevance):
+            result['rerank_score'] = float(rerank_score)
+            result['relevance_score'] = 0.6 * result['score'] + 0.4 * result['rerank_score']
+    
+    def _exact_lookup(self, key: bytes, top_k: int) -> Optional[List[Dict]]:
+        """Return cached results for an identical normalized query"""
+        with self._cache_lock:
+            entry = self._exact_cache.get(key)
+            if entry is None or entry[0] < top_k:
+                return None
+            self._exact_cache.move_to_end(key)
+            self._cache_stats["exact_hits"] += 1
+            return [dict(result) for result in entry[1][:top_k]]
+    
+    def _semantic_lookup(self, embedding: np.ndarray, top_k: int) -> Optional[List[Dict]]:
+        """Return cached results for a query whose embedding is close enough"""
+        with self._cache_lock:
+            if not self._cache_count:
+                self._cache_stats["misses"] += 1
+                return None
+            sims = self._cache_keys[:self._cache_count] @ embedding
+            best = int(np.argmax(sims))
+            entry = self._cache_vals[best]
+            if sims[best] < self.SEMANTIC_CACHE_THRESHOLD or entry[0] < top_k:
+                self._cache_stats["misses"] += 1
+                return None
+            self._cache_stats["semantic_hits"] += 1
+            return [dict(result) for result in entry[1][:top_k]]
+    
+    def _cache_store(self, key: bytes, embedding: np.ndarray, top_k: int, results: List[Dict], generation: int):
+        """Remember results in both cache tiers, evicting the oldest entries"""
+        with self._cache_lock:
+            # Results searched before an index change would be stale on arrival
+            if generation != self._cache_generation:
+                return
+            entry = (top_k, results)
+            self._exact_cache[key] = entry
+            self._exact_cache.move_to_end(key)
+            if len(self._exact_cache) > self.CACHE_SIZE:
+                self._exact_cache.popitem(last=False)
+            
+            if self._cache_keys is None:
+                self._cache_keys = np.zeros((self.CACHE_SIZE, embedding.shape[0]), dtype=np.float32)
+            self._cache_keys[self._cache_next] = embedding
+            self._cache_vals[self._cache_next] = entry
+            self._cache_next = (self._cache_next + 1) % self.CACHE_SIZE
+            self._cache_count = min(self._cache_count + 1, self.CACHE_SIZE)
     
     def _calculate_credibility(self, article: Dict) -> float:
         """Calculate credibility score for an article"""
@@ -52,9 +213,12 @@ class NewsSearcher:
         # For now, return a default score
         return 0.7
     
-    def __del__(self):
-        """Cleanup resources"""
-        try:
-            self.snowflake.close()
-        except:
-            pass
+    def close(self):
+        """Close the Snowflake connections"""
+        self.snowflake.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,12 +1,165 @@
 import snowflake.connector
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+import functools
+import hashlib
 import os
 import json
-from sentence_transformers import SentenceTransformer
+import queue
+import threading
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
 import numpy as np
 from dotenv import load_dotenv
+from .vector_index import VectorIndex, inner_products, normalize_rows, top_k_indices
+
+try:
+    import pandas as pd
+    from snowflake.connector.pandas_tools import write_pandas
+except ImportError:  # pandas/pyarrow extras are optional; fall back to INSERTs
+    pd = write_pandas = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; json.dumps gives the same text
+    orjson = None
+
+if TYPE_CHECKING:
+    # sentence-transformers pulls in torch; it is imported when a model loads
+    from sentence_transformers import SentenceTransformer
+
+# Indicator terms for generate_analysis, built once at import
+_ANALYSIS_INDICATORS = {
+    'emotional': frozenset({'outrageous', 'shocking', 'terrible', 'amazing', 'incredible'}),
+    'partisan': frozenset({'leftist', 'rightist', 'liberal', 'conservative', 'radical'}),
+    'loaded': frozenset({'regime', 'elite', 'conspiracy', 'propaganda'})
+}
+_ANALYSIS_LEANING = {
+    'left': frozenset({'progressive', 'liberal', 'democrat', 'socialism'}),
+    'right': frozenset({'conservative', 'republican', 'traditional', 'freedom'})
+}
+
+def get_embedding_model(model_name: str = 'all-MiniLM-L6-v2') -> 'SentenceTransformer':
+    """Return a process-wide SentenceTransformer, loading each model only once"""
+    # fp32 (default), int8 (dynamic quantization), bf16, onnx or onnx-int8
+    precision = os.getenv("VERIFAI_EMBEDDING_PRECISION", "fp32").lower()
+    return _load_embedding_model(model_name, precision)
+
+@functools.lru_cache(maxsize=None)
+def _load_embedding_model(model_name: str, precision: str) -> 'SentenceTransformer':
+    """Load an embedding model at the requested precision and warm it up"""
+    from sentence_transformers import SentenceTransformer
+    
+    # Optional intra-op thread count for CPU inference
+    threads = os.getenv("VERIFAI_TORCH_THREADS")
+    if threads:
+        import torch
+        torch.set_num_threads(int(threads))
+    
+    if precision == "onnx":
+        model = _load_onnx(model_name, "onnx/model.onnx")
+    elif precision == "onnx-int8":
+        model = _load_onnx(model_name, "onnx/model_qint8_avx512_vnni.onnx")
+    else:
+        model = _convert_precision(SentenceTransformer(model_name), precision)
+    model.eval()
+    
+    # One tiny forward pass so the first real query skips lazy initialization
+    model.encode(["warm up"], show_progress_bar=False)
+    return model
+
+def _load_onnx(model_name: str, file_name: str) -> 'SentenceTransformer':
+    """Load an ONNX Runtime export of a model, falling back to PyTorch fp32"""
+    from sentence_transformers import SentenceTransformer
+    
+    # A local export from scripts/export_onnx.py, or the Hub repo's own file
+    model_path = os.getenv("VERIFAI_ONNX_MODEL_DIR", model_name)
+    try:
+        return SentenceTransformer(
+            model_path,
+            backend="onnx",
+            model_kwargs={"file_name": file_name}
+        )
+    except Exception as e:
+        print(f"Error loading ONNX embedding model: {str(e)}")
+        return SentenceTransformer(model_name)
+
+def _convert_precision(model: 'SentenceTransformer', precision: str) -> 'SentenceTransformer':
+    """Convert an embedding model to the requested inference precision"""
+    if precision == "fp32":
+        return model
+    
+    try:
+        import torch
+        if precision == "int8":
+            # Quantize the Linear layers' weights; activations stay float
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if precision == "bf16":
+            return model.to(torch.bfloat16)
+        print(f"Unknown embedding precision {precision!r}, using fp32")
+    except Exception as e:
+        print(f"Error converting embedding model to {precision}: {str(e)}")
+    return model
+
+def _new_ids(count: int) -> List[str]:
+    """Generate random 32-character hex IDs from a single urandom call"""
+    blob = os.urandom(16 * count)
+    return [blob[i:i + 16].hex() for i in range(0, 16 * count, 16)]
+
+def _embedding_json(embedding: np.ndarray) -> str:
+    """Serialize an embedding as a compact JSON list for PARSE_JSON"""
+    if orjson is not None:
+        return orjson.dumps(np.ascontiguousarray(embedding, dtype=np.float32), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(embedding.tolist())
+
+def _pack_float16(embedding: np.ndarray) -> str:
+    """Pack an embedding as hex-encoded little-endian float16 for a BINARY column"""
+    return np.asarray(embedding, dtype='<f2').tobytes().hex()
+
+def _decode_embedding(packed: Optional[bytes], embedding_str: Optional[str]) -> np.ndarray:
+    """Decode a stored embedding, preferring the packed float16 copy over the text form"""
+    if packed is not None:
+        return np.frombuffer(packed, dtype='<f2').astype(np.float32)
+    return np.array(embedding_str.split(','), dtype=np.float32)
 
 class SnowflakeManager:
+    # Dimension of the all-MiniLM-L6-v2 sentence embeddings
+    EMBEDDING_DIM = 384
+    
+    # SQL casts that turn a parsed JSON list into a VECTOR value
+    VECTOR_CAST = f"::ARRAY::VECTOR(FLOAT, {EMBEDDING_DIM})"
+    VECTOR_PARAM = f"PARSE_JSON(%s){VECTOR_CAST}"
+    
+    # Rows fetched per round trip when scanning legacy ARRAY embeddings
+    SCAN_BATCH_ROWS = 5000
+    
+    # Batches at least this large are staged with write_pandas (PUT + COPY INTO)
+    BULK_INDEX_MIN_ROWS = 200
+    
+    # write_pandas splits bulk loads into Parquet files of this many rows,
+    # uploaded in parallel and copied in one statement
+    BULK_CHUNK_ROWS = 16000
+    
+    # Fixed statement text, so Snowflake can reuse the compiled plan
+    INSERT_ARTICLES_SQL = """
+    INSERT INTO NEWS_ARTICLES (id, title, content, url, domain)
+    VALUES (%s, %s, %s, %s, %s)
+    """
+    
+    # Query embeddings remembered by encode_queries
+    ENCODE_CACHE_SIZE = 1024
+    
+    # Connections searches may hold at once, including the primary one
+    POOL_SIZE = 4
+    
+    # In-memory ANN mirror of ARTICLE_EMBEDDINGS, shared by every manager in
+    # the process; enabled with VERIFAI_LOCAL_INDEX=1
+    _local_index = None
+    _local_index_lock = threading.Lock()
+    
+    # Bumped whenever articles are indexed or the local index is rebuilt, so
+    # result caches in the process know to forget what they hold
+    index_generation = 0
+    
     def __init__(self):
         # Load environment variables
         load_dotenv()
@@ -42,6 +195,9 @@ class SnowflakeManager:
             "user": os.getenv("SNOWFLAKE_USER"),
             "password": os.getenv("SNOWFLAKE_PASSWORD"),
             "role": os.getenv("SNOWFLAKE_ROLE"),
+            # The app holds these connections for its lifetime; heartbeats
+            # stop idle sessions expiring and forcing a fresh login
+            "client_session_keep_alive": True,
         }
         
         if region:
@@ -49,14 +205,65 @@ class SnowflakeManager:
             
         self.conn = snowflake.connector.connect(**connection_params)
         
-        # Initialize sentence transformer for embeddings
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        
         # After connection is established, set up database and schema
         self._ensure_database_exists()
         
+        # Searches and writes lease connections from a small pool so concurrent
+        # calls never share a session; the primary connection is one of them
+        self._pool_params = dict(
+            connection_params,
+            database=os.getenv("SNOWFLAKE_DATABASE"),
+            schema="ML",
+            warehouse=os.getenv("SNOWFLAKE_WAREHOUSE")
+        )
+        self._pool = queue.Queue()
+        self._pool.put(self.conn)
+        self._pool_opened = 1
+        self._pool_lock = threading.Lock()
+        
+        # LRU of query embeddings keyed on a hash of the text
+        self._encode_cache = OrderedDict()
+        self._encode_lock = threading.Lock()
+        
         # Set up required tables
         self.setup_tables()
+        
+        # Tables created before the VECTOR column keep the legacy ARRAY layout
+        self.vector_embeddings = self._has_vector_embeddings()
+        
+        # Load the hot embedding mirror once per process
+        if os.getenv("VERIFAI_LOCAL_INDEX", "").lower() in ("1", "true", "yes", "int8"):
+            self._ensure_local_index()
+    
+    @functools.cached_property
+    def model(self) -> 'SentenceTransformer':
+        """Sentence transformer for embeddings, loaded on first encode and shared per process"""
+        return get_embedding_model()
+    
+    @contextmanager
+    def _lease(self):
+        """Borrow a pooled connection, opening a new one while fewer than POOL_SIZE exist"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                grow = self._pool_opened < self.POOL_SIZE
+                if grow:
+                    self._pool_opened += 1
+            if grow:
+                try:
+                    conn = snowflake.connector.connect(**self._pool_params)
+                except Exception:
+                    with self._pool_lock:
+                        self._pool_opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
     
     def _ensure_database_exists(self):
         """Ensure database and schema exist"""
@@ -117,13 +324,22 @@ class SnowflakeManager:
             )
             """)
             
-            cursor.execute("""
+            cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS ARTICLE_EMBEDDINGS (
                 article_id VARCHAR NOT NULL,
-                embedding ARRAY,
+                embedding VECTOR(FLOAT, {self.EMBEDDING_DIM}),
+                embedding_f16 BINARY({2 * self.EMBEDDING_DIM}),
                 created_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
                 FOREIGN KEY (article_id) REFERENCES NEWS_ARTICLES(id)
             )
+            COMMENT = 'Embeddings are stored L2-normalized, so cosine similarity is an inner product'
+            """)
+            
+            # Packed float16 copy read by client-side scans; a quarter of the
+            # bytes of the ARRAY_TO_STRING text form
+            cursor.execute(f"""
+            ALTER TABLE ARTICLE_EMBEDDINGS
+            ADD COLUMN IF NOT EXISTS embedding_f16 BINARY({2 * self.EMBEDDING_DIM})
             """)
             
             cursor.execute("""
@@ -158,80 +374,374 @@ class SnowflakeManager:
         finally:
             cursor.close()
     
+    def _has_vector_embeddings(self) -> bool:
+        """Check whether ARTICLE_EMBEDDINGS stores embeddings as a VECTOR column"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("DESCRIBE TABLE ARTICLE_EMBEDDINGS")
+            for row in cursor.fetchall():
+                if row[0].upper() == "EMBEDDING":
+                    return row[1].upper().startswith("VECTOR")
+            return False
+        except Exception as e:
+            print(f"Error inspecting embeddings table: {str(e)}")
+            return False
+        finally:
+            cursor.close()
+    
+    def _ensure_local_index(self):
+        """Build the shared in-memory index from ARTICLE_EMBEDDINGS if it is not loaded yet"""
+        with SnowflakeManager._local_index_lock:
+            if SnowflakeManager._local_index is None:
+                self._load_local_index()
+    
+    def refresh_local_index(self):
+        """Rebuild the shared in-memory index from scratch, e.g. to rebalance the HNSW graph"""
+        with SnowflakeManager._local_index_lock:
+            self._load_local_index()
+            SnowflakeManager.index_generation += 1
+    
+    def _load_local_index(self):
+        """Stream ARTICLE_EMBEDDINGS into a new VectorIndex and swap it in; caller holds the lock"""
+        # VERIFAI_LOCAL_INDEX=int8 selects the exact int8 scan over the ANN graph
+        backend = "int8" if os.getenv("VERIFAI_LOCAL_INDEX", "").lower() == "int8" else None
+        index = VectorIndex(self.EMBEDDING_DIM, backend=backend)
+        embedding = "e.embedding::ARRAY" if self.vector_embeddings else "e.embedding"
+        with self._lease() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"""
+                SELECT
+                    e.article_id,
+                    e.embedding_f16,
+                    IFF(e.embedding_f16 IS NULL, ARRAY_TO_STRING({embedding}, ','), NULL)
+                FROM ARTICLE_EMBEDDINGS e
+                """)
+                while True:
+                    fetched = cursor.fetchmany(self.SCAN_BATCH_ROWS)
+                    if not fetched:
+                        break
+                    
+                    ids = []
+                    matrix = np.empty((len(fetched), self.EMBEDDING_DIM), dtype=np.float32)
+                    for article_id, packed, embedding_str in fetched:
+                        try:
+                            article_embedding = _decode_embedding(packed, embedding_str)
+                        except (ValueError, TypeError, AttributeError) as e:
+                            print(f"Error processing embedding: {str(e)}")
+                            continue
+                        if article_embedding.shape[0] == self.EMBEDDING_DIM:
+                            matrix[len(ids)] = article_embedding
+                            ids.append(article_id)
+                    index.add(ids, normalize_rows(matrix[:len(ids)]))
+                
+                print(f"Loaded {len(index)} embeddings into the local {index.backend} index")
+                SnowflakeManager._local_index = index
+                
+            except Exception as e:
+                print(f"Error loading local embedding index: {str(e)}")
+            finally:
+                cursor.close()
+    
     def index_article(self, article_data: Dict) -> str:
         """Index an article in Snowflake"""
-        cursor = self.conn.cursor()
+        return self.index_articles([article_data])[0]
+    
+    def index_articles(self, articles: List[Dict]) -> List[str]:
+        """Index several articles with one batched encode and one insert per table"""
+        if not articles:
+            return []
         
-        try:
-            # Generate article ID if not provided
-            article_id = article_data.get('id', os.urandom(16).hex())
-            
-            # Insert article
-            cursor.execute("""
-            INSERT INTO NEWS_ARTICLES (id, title, content, url, domain)
-            VALUES (%s, %s, %s, %s, %s)
-            """, (
+        # Generate article IDs if not provided
+        fresh_ids = iter(_new_ids(sum(1 for article_data in articles if not article_data.get('id'))))
+        article_ids = [article_data.get('id') or next(fresh_ids) for article_data in articles]
+        article_rows = [
+            (
                 article_id,
                 article_data.get('title'),
                 article_data.get('text'),
                 article_data.get('url'),
                 article_data.get('domain')
-            ))
-            
-            # Generate and store embedding
-            text = f"{article_data.get('title', '')} {article_data.get('text', '')}"
-            embedding = self.model.encode(text)
-            
-            # Convert numpy array to list of floats and then to string
-            embedding_str = ','.join(map(str, embedding.tolist()))
-            
-            # Store embedding
-            cursor.execute("""
-            INSERT INTO ARTICLE_EMBEDDINGS (article_id, embedding)
-            SELECT %s, ARRAY_CONSTRUCT_FROM_STRING(%s, ',')
-            """, (
-                article_id,
-                embedding_str
-            ))
-            
-            return article_id
+            )
+            for article_id, article_data in zip(article_ids, articles)
+        ]
+        
+        # Generate unit-length embeddings in one forward pass;
+        # sentence-transformers length-sorts the batch internally
+        texts = [f"{article_data.get('title', '')} {article_data.get('text', '')}" for article_data in articles]
+        embeddings = self.model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        
+        # Bind each embedding as one JSON list and convert it server side,
+        # alongside its packed float16 copy
+        cast = self.VECTOR_CAST if self.vector_embeddings else "::ARRAY"
+        embedding_rows = [
+            (article_id, _embedding_json(embedding), _pack_float16(embedding))
+            for article_id, embedding in zip(article_ids, embeddings)
+        ]
+        
+        # Write on a leased connection so the transaction never shares a
+        # session with concurrent searches
+        with self._lease() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                if write_pandas is not None and len(articles) >= self.BULK_INDEX_MIN_ROWS:
+                    self._bulk_insert(conn, cursor, article_rows, embedding_rows, cast)
+                else:
+                    # Both inserts commit together, or not at all
+                    cursor.execute("BEGIN")
+                    try:
+                        # Insert articles
+                        cursor.executemany(self.INSERT_ARTICLES_SQL, article_rows)
+                        
+                        # Store embeddings
+                        cursor.execute(f"""
+                        INSERT INTO ARTICLE_EMBEDDINGS (article_id, embedding, embedding_f16)
+                        SELECT column1, PARSE_JSON(column2){cast}, TO_BINARY(column3, 'HEX')
+                        FROM VALUES {', '.join(['(%s, %s, %s)'] * len(articles))}
+                        """, [value for row in embedding_rows for value in row])
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                
+            finally:
+                cursor.close()
+        
+        # Keep the in-memory mirror in step with the table
+        with SnowflakeManager._local_index_lock:
+            if SnowflakeManager._local_index is not None:
+                SnowflakeManager._local_index.add(article_ids, embeddings)
+            SnowflakeManager.index_generation += 1
+        
+        return article_ids
+    
+    def _bulk_insert(self, conn, cursor, article_rows: List[tuple], embedding_rows: List[tuple], cast: str):
+        """Load a large batch through staged Parquet files instead of bound INSERTs"""
+        articles_df = pd.DataFrame(article_rows, columns=["ID", "TITLE", "CONTENT", "URL", "DOMAIN"])
+        write_pandas(
+            conn,
+            articles_df,
+            "NEWS_ARTICLES",
+            chunk_size=self.BULK_CHUNK_ROWS,
+            compression="snappy",
+            quote_identifiers=False
+        )
+        
+        self._stage_embeddings(conn, cursor, embedding_rows)
+        cursor.execute(f"""
+        INSERT INTO ARTICLE_EMBEDDINGS (article_id, embedding, embedding_f16)
+        SELECT article_id, PARSE_JSON(embedding_json){cast}, TO_BINARY(embedding_f16, 'HEX')
+        FROM ARTICLE_EMBEDDINGS_STAGE
+        """)
+    
+    def _stage_embeddings(self, conn, cursor, embedding_rows: List[tuple]):
+        """Load (article_id, embedding JSON, float16 hex) rows into a temporary staging table"""
+        # Parquet cannot load into a VECTOR column, so the JSON text is staged
+        # and cast on the way into ARTICLE_EMBEDDINGS
+        if write_pandas is not None:
+            embeddings_df = pd.DataFrame(embedding_rows, columns=["ARTICLE_ID", "EMBEDDING_JSON", "EMBEDDING_F16"])
+            write_pandas(
+                conn,
+                embeddings_df,
+                "ARTICLE_EMBEDDINGS_STAGE",
+                chunk_size=self.BULK_CHUNK_ROWS,
+                compression="snappy",
+                auto_create_table=True,
+                table_type="temporary",
+                overwrite=True,
+                quote_identifiers=False
+            )
+            return
+        
+        cursor.execute("""
+        CREATE OR REPLACE TEMPORARY TABLE ARTICLE_EMBEDDINGS_STAGE (
+            article_id VARCHAR,
+            embedding_json VARCHAR,
+            embedding_f16 VARCHAR
+        )
+        """)
+        cursor.executemany("""
+        INSERT INTO ARTICLE_EMBEDDINGS_STAGE (article_id, embedding_json, embedding_f16)
+        VALUES (%s, %s, %s)
+        """, embedding_rows)
+    
+    def normalize_stored_embeddings(self) -> int:
+        """Rewrite stored embeddings at unit length with a float16 copy; a one-off migration for older rows"""
+        with self._lease() as conn:
+            cursor = conn.cursor()
             
-        finally:
-            cursor.close()
+            try:
+                array_sql = "e.embedding::ARRAY" if self.vector_embeddings else "e.embedding"
+                cursor.execute(f"""
+                SELECT e.article_id, ARRAY_TO_STRING({array_sql}, ','), e.embedding_f16 IS NULL
+                FROM ARTICLE_EMBEDDINGS e
+                """)
+                
+                embedding_rows = []
+                for article_id, embedding_str, missing_f16 in cursor.fetchall():
+                    try:
+                        embedding = np.array(embedding_str.split(','), dtype=np.float32)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        print(f"Error processing embedding: {str(e)}")
+                        continue
+                    norm = np.linalg.norm(embedding)
+                    if norm > 0 and (missing_f16 or abs(norm - 1.0) > 1e-3):
+                        embedding = embedding / norm
+                        embedding_rows.append((article_id, _embedding_json(embedding), _pack_float16(embedding)))
+                
+                if not embedding_rows:
+                    return 0
+                
+                cast = self.VECTOR_CAST if self.vector_embeddings else "::ARRAY"
+                self._stage_embeddings(conn, cursor, embedding_rows)
+                cursor.execute(f"""
+                UPDATE ARTICLE_EMBEDDINGS e
+                SET
+                    embedding = PARSE_JSON(s.embedding_json){cast},
+                    embedding_f16 = TO_BINARY(s.embedding_f16, 'HEX')
+                FROM ARTICLE_EMBEDDINGS_STAGE s
+                WHERE e.article_id = s.article_id
+                """)
+                conn.commit()
+                return len(embedding_rows)
+                
+            finally:
+                cursor.close()
+    
+    def encode_queries(self, texts: List[str]) -> np.ndarray:
+        """Encode query texts in one batched forward pass, reusing recently seen texts"""
+        if not texts:
+            return np.empty((0, self.EMBEDDING_DIM), dtype=np.float32)
+        
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        embeddings = [None] * len(texts)
+        with self._encode_lock:
+            for i, key in enumerate(keys):
+                cached = self._encode_cache.get(key)
+                if cached is not None:
+                    self._encode_cache.move_to_end(key)
+                    embeddings[i] = cached
+        
+        # Only the texts not seen recently go through the model
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            encoded = self.model.encode(
+                [texts[i] for i in misses],
+                batch_size=32,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            with self._encode_lock:
+                for i, embedding in zip(misses, encoded):
+                    embeddings[i] = embedding
+                    self._encode_cache[keys[i]] = embedding
+                    self._encode_cache.move_to_end(keys[i])
+                    if len(self._encode_cache) > self.ENCODE_CACHE_SIZE:
+                        self._encode_cache.popitem(last=False)
+        
+        return np.stack(embeddings)
     
     def semantic_search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Perform semantic search using embeddings"""
-        cursor = self.conn.cursor()
+        return self.semantic_search_batch(self.encode_queries([query]), top_k=top_k)[0]
+    
+    def semantic_search_batch(self, query_embeddings: np.ndarray, top_k: int = 5) -> List[List[Dict]]:
+        """Perform semantic search for several query embeddings"""
+        queries = np.atleast_2d(np.array(query_embeddings, dtype=np.float32))
+        if queries.shape[0] == 0:
+            return []
         
-        try:
-            # Generate query embedding
-            query_embedding = np.array(self.model.encode(query))
-            
-            # Fetch all articles and embeddings
-            cursor.execute("""
-            SELECT 
-                a.id, a.title, a.content, a.url, a.domain,
-                ARRAY_TO_STRING(e.embedding, ',') as embedding_str
-            FROM NEWS_ARTICLES a
-            JOIN ARTICLE_EMBEDDINGS e ON a.id = e.article_id
-            """)
-            
-            results = []
-            for row in cursor.fetchall():
-                try:
-                    # Convert embedding string to numpy array
-                    embedding_values = [float(x) for x in row[5].split(',')]
-                    article_embedding = np.array(embedding_values)
+        if SnowflakeManager._local_index is not None and len(SnowflakeManager._local_index):
+            return self._local_search(queries, top_k)
+        if self.vector_embeddings:
+            return self._vector_search(queries, top_k)
+        return self._scan_search(queries, top_k)
+    
+    def _local_search(self, queries: np.ndarray, top_k: int) -> List[List[Dict]]:
+        """Rank articles with the in-memory index, then fetch only the winners' metadata"""
+        hits = SnowflakeManager._local_index.search(normalize_rows(queries), top_k)
+        article_ids = list({article_id for query_hits in hits for article_id, _ in query_hits})
+        if not article_ids:
+            return [[] for _ in hits]
+        
+        with self._lease() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"""
+                SELECT id, title, content, url, domain
+                FROM NEWS_ARTICLES
+                WHERE id IN ({', '.join(['%s'] * len(article_ids))})
+                """, article_ids)
+                metadata = {
+                    row[0]: {
+                        "id": row[0],
+                        "title": row[1],
+                        "content": row[2],
+                        "url": row[3],
+                        "domain": row[4]
+                    }
+                    for row in cursor.fetchall()
+                }
+            finally:
+                cursor.close()
+        
+        return [
+            [
+                {"score": score, "metadata": metadata[article_id]}
+                for article_id, score in query_hits
+                if article_id in metadata
+            ]
+            for query_hits in hits
+        ]
+    
+    def _vector_search(self, queries: np.ndarray, top_k: int) -> List[List[Dict]]:
+        """Rank articles in Snowflake by inner product, fetching only top_k rows"""
+        with self._lease() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                # Stored rows are unit length, so unit queries make this the cosine
+                queries = normalize_rows(queries)
+                
+                sql = f"""
+                SELECT 
+                    a.id, a.title, a.content, a.url, a.domain,
+                    VECTOR_INNER_PRODUCT(e.embedding, {self.VECTOR_PARAM}) AS score
+                FROM NEWS_ARTICLES a
+                JOIN ARTICLE_EMBEDDINGS e ON a.id = e.article_id
+                ORDER BY score DESC NULLS LAST
+                LIMIT %s
+                """
+                params = [(_embedding_json(query), top_k) for query in queries]
+                
+                # Several queries are submitted together and run concurrently
+                # in the warehouse; a single one skips the async polling
+                if len(params) > 1:
+                    query_ids = []
+                    for query_params in params:
+                        cursor.execute_async(sql, query_params)
+                        query_ids.append(cursor.sfqid)
+                else:
+                    query_ids = [None]
+                
+                results = []
+                for query_id, query_params in zip(query_ids, params):
+                    if query_id is None:
+                        cursor.execute(sql, query_params)
+                    else:
+                        cursor.get_results_from_sfqid(query_id)
                     
-                    # Ensure both embeddings have the same shape
-                    if query_embedding.shape == article_embedding.shape:
-                        # Calculate cosine similarity
-                        similarity = np.dot(query_embedding, article_embedding) / (
-                            np.linalg.norm(query_embedding) * np.linalg.norm(article_embedding)
-                        )
-                        
-                        results.append({
-                            "score": float(similarity),
+                    results.append([
+                        {
+                            "score": float(row[5] or 0.0),
                             "metadata": {
                                 "id": row[0],
                                 "title": row[1],
@@ -239,134 +749,207 @@ class SnowflakeManager:
                                 "url": row[3],
                                 "domain": row[4]
                             }
-                        })
-                except (ValueError, TypeError, AttributeError) as e:
-                    print(f"Error processing embedding: {str(e)}")
-                    continue
-            
-            # Sort by similarity and return top_k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:top_k]
+                        }
+                        for row in cursor.fetchall()
+                    ])
+                return results
+                
+            finally:
+                cursor.close()
+    
+    def _scan_search(self, queries: np.ndarray, top_k: int) -> List[List[Dict]]:
+        """Rank articles client side for tables with the legacy ARRAY embedding column"""
+        with self._lease() as conn:
+            cursor = conn.cursor()
             
-        finally:
-            cursor.close()
+            try:
+                # Fetch all articles and embeddings
+                cursor.execute("""
+                SELECT 
+                    a.id, a.title, a.content, a.url, a.domain,
+                    e.embedding_f16,
+                    IFF(e.embedding_f16 IS NULL, ARRAY_TO_STRING(e.embedding, ','), NULL) as embedding_str
+                FROM NEWS_ARTICLES a
+                JOIN ARTICLE_EMBEDDINGS e ON a.id = e.article_id
+                """)
+                
+                # Stream rows in batches, keeping only each query's running top_k
+                queries = normalize_rows(queries)
+                rows = []
+                scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+                while True:
+                    fetched = cursor.fetchmany(self.SCAN_BATCH_ROWS)
+                    if not fetched:
+                        break
+                    
+                    batch_rows = []
+                    matrix = np.empty((len(fetched), queries.shape[1]), dtype=np.float32)
+                    for row in fetched:
+                        try:
+                            # Decode the float16 copy, or the string for unmigrated rows
+                            article_embedding = _decode_embedding(row[5], row[6])
+                        except (ValueError, TypeError, AttributeError) as e:
+                            print(f"Error processing embedding: {str(e)}")
+                            continue
+                        
+                        # Ensure both embeddings have the same shape
+                        if article_embedding.shape[0] == queries.shape[1]:
+                            matrix[len(batch_rows)] = article_embedding
+                            batch_rows.append(row)
+                    if not batch_rows:
+                        continue
+                    
+                    # Cosine similarity of every query against the batch in one
+                    # matmul over unit-length rows, merged with the survivors so far
+                    batch_scores = inner_products(queries, normalize_rows(matrix[:len(batch_rows)]))
+                    scores = np.hstack([scores, batch_scores])
+                    rows.extend(batch_rows)
+                    keep = np.unique(top_k_indices(scores, top_k))
+                    scores = scores[:, keep]
+                    rows = [rows[i] for i in keep]
+                
+                if not rows:
+                    return [[] for _ in range(queries.shape[0])]
+                
+                # Select and sort only the top_k for each query
+                ranked = top_k_indices(scores, top_k)
+                return [
+                    [
+                        {
+                            "score": float(query_scores[i]),
+                            "metadata": {
+                                "id": rows[i][0],
+                                "title": rows[i][1],
+                                "content": rows[i][2],
+                                "url": rows[i][3],
+                                "domain": rows[i][4]
+                            }
+                        }
+                        for i in order
+                    ]
+                    for query_scores, order in zip(scores, ranked)
+                ]
+                
+            finally:
+                cursor.close()
     
     def store_analysis(self, article_data: Dict, bias_results: Dict, related_articles: List[Dict]) -> str:
         """Store analysis results in Snowflake"""
-        cursor = self.conn.cursor()
-        
-        try:
-            # Generate unique ID for the analysis
-            analysis_id = os.urandom(16).hex()
-            
-            # Store article
-            cursor.execute("""
-            INSERT INTO NEWS_ARTICLES (
-                id, title, content, url, domain, created_at
-            ) VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP())
-            """, (
-                analysis_id,
-                article_data.get('title', ''),
-                article_data.get('text', ''),
-                article_data.get('url', ''),
-                article_data.get('domain', '')
-            ))
+        with self._lease() as conn:
+            cursor = conn.cursor()
             
-            # Store analysis results
-            cursor.execute("""
-            INSERT INTO ANALYSIS_RESULTS (
-                article_id,
-                bias_score,
-                political_leaning,
-                sentiment,
-                analysis_data,
-                created_at
-            ) VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP())
-            """, (
-                analysis_id,
-                bias_results.get('bias_score', 0.0),
-                bias_results.get('political_leaning', 'unknown'),
-                bias_results.get('sentiment', 'neutral'),
-                json.dumps(bias_results)
-            ))
-            
-            # Store related articles
-            for article in related_articles:
-                related_id = os.urandom(16).hex()
-                metadata = article.get('metadata', {})
+            try:
+                # Generate unique ID for the analysis
+                analysis_id, *related_ids = _new_ids(1 + len(related_articles))
                 
+                # Store article
                 cursor.execute("""
                 INSERT INTO NEWS_ARTICLES (
                     id, title, content, url, domain, created_at
                 ) VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP())
                 """, (
-                    related_id,
-                    metadata.get('title', ''),
-                    metadata.get('content', ''),
-                    metadata.get('url', ''),
-                    metadata.get('domain', '')
+                    analysis_id,
+                    article_data.get('title', ''),
+                    article_data.get('text', ''),
+                    article_data.get('url', ''),
+                    article_data.get('domain', '')
                 ))
                 
-                # Store relationship
+                # Store analysis results
                 cursor.execute("""
-                INSERT INTO ARTICLE_RELATIONSHIPS (
-                    source_id,
-                    related_id,
-                    similarity_score,
+                INSERT INTO ANALYSIS_RESULTS (
+                    article_id,
+                    bias_score,
+                    political_leaning,
+                    sentiment,
+                    analysis_data,
                     created_at
-                ) VALUES (%s, %s, %s, CURRENT_TIMESTAMP())
+                ) VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP())
                 """, (
                     analysis_id,
-                    related_id,
-                    article.get('score', 0.0)
+                    bias_results.get('bias_score', 0.0),
+                    bias_results.get('political_leaning', 'unknown'),
+                    bias_results.get('sentiment', 'neutral'),
+                    json.dumps(bias_results)
                 ))
-            
-            # Commit the transaction
-            self.conn.commit()
-            return analysis_id
-            
-        except Exception as e:
-            print(f"Error storing analysis: {str(e)}")
-            self.conn.rollback()
-            raise
-        finally:
-            cursor.close()
+                
+                # Store related articles and their relationships, one statement per table
+                if related_articles:
+                    cursor.executemany("""
+                    INSERT INTO NEWS_ARTICLES (
+                        id, title, content, url, domain, created_at
+                    ) VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP())
+                    """, [
+                        (
+                            related_id,
+                            article.get('metadata', {}).get('title', ''),
+                            article.get('metadata', {}).get('content', ''),
+                            article.get('metadata', {}).get('url', ''),
+                            article.get('metadata', {}).get('domain', '')
+                        )
+                        for related_id, article in zip(related_ids, related_articles)
+                    ])
+                    
+                    cursor.executemany("""
+                    INSERT INTO ARTICLE_RELATIONSHIPS (
+                        source_id,
+                        related_id,
+                        similarity_score,
+                        created_at
+                    ) VALUES (%s, %s, %s, CURRENT_TIMESTAMP())
+                    """, [
+                        (analysis_id, related_id, article.get('score', 0.0))
+                        for related_id, article in zip(related_ids, related_articles)
+                    ])
+                
+                # Commit the transaction
+                conn.commit()
+                return analysis_id
+                
+            except Exception as e:
+                print(f"Error storing analysis: {str(e)}")
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
     
     def close(self):
-        """Close Snowflake connection"""
+        """Close Snowflake connections"""
+        # Extra pooled connections first; the primary one is among them
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except (queue.Empty, AttributeError):
+                break
+            if conn is not self.conn:
+                conn.close()
         if self.conn:
             self.conn.close()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def generate_analysis(self, article_text: str, related_articles: List[Dict], prompt_template: str = None) -> Dict:
         """Generate analysis using basic NLP techniques"""
         try:
-            # Calculate basic metrics
-            words = article_text.lower().split()
-            total_words = len(words)
-            
-            # Define bias indicators
-            bias_indicators = {
-                'emotional': ['outrageous', 'shocking', 'terrible', 'amazing', 'incredible'],
-                'partisan': ['leftist', 'rightist', 'liberal', 'conservative', 'radical'],
-                'loaded': ['regime', 'elite', 'conspiracy', 'propaganda']
-            }
+            # Count every word once and look indicators up in the counts
+            word_counts = Counter(article_text.lower().split())
+            total_words = sum(word_counts.values())
             
             # Count bias indicators
-            bias_counts = {category: sum(1 for word in words if word in terms) 
-                         for category, terms in bias_indicators.items()}
+            bias_counts = {category: sum(word_counts[term] for term in terms)
+                         for category, terms in _ANALYSIS_INDICATORS.items()}
             
             # Calculate bias score based on indicator presence
             total_bias_words = sum(bias_counts.values())
             bias_score = min(1.0, total_bias_words / (total_words * 0.1)) if total_words > 0 else 0.5
             
             # Determine political leaning based on word usage
-            partisan_words = {
-                'left': ['progressive', 'liberal', 'democrat', 'socialism'],
-                'right': ['conservative', 'republican', 'traditional', 'freedom']
-            }
-            
-            left_count = sum(1 for word in words if word in partisan_words['left'])
-            right_count = sum(1 for word in words if word in partisan_words['right'])
+            left_count = sum(word_counts[term] for term in _ANALYSIS_LEANING['left'])
+            right_count = sum(word_counts[term] for term in _ANALYSIS_LEANING['right'])
             
             if abs(left_count - right_count) < 2:
                 leaning = "center"
@@ -37,12 +37,13 @@ class TruLensOptimizer:
         if not related_articles:
             return 0.0
         
-        relevance_scores = [
-            article.get('relevance_score', 0.0)
-            for article in related_articles
-        ]
+        relevance_scores = np.fromiter(
+            (article.get('relevance_score', 0.0) for article in related_articles),
+            dtype=np.float64,
+            count=len(related_articles)
+        )
         
-        return np.mean(relevance_scores)
+        return float(relevance_scores.mean())
     
     def evaluate_bias_detection(self,
                               bias_results: Dict,
@@ -113,9 +114,14 @@ class TruLensOptimizer:
         # This is a placeholder - in a real implementation,
         # you'd want to use more sophisticated optimization techniques
         
-        scores = np.array([r['overall_score'] for r in evaluation_results])
-        best_idx = np.argmax(scores)
-        best_result = evaluation_results[best_idx]
+        # Best score and running total in one pass over the results
+        best_result = evaluation_results[0]
+        total = 0.0
+        for result in evaluation_results:
+            score = result['overall_score']
+            total += score
+            if score > best_result['overall_score']:
+                best_result = result
         
         # Extract parameters from best result
         optimal_params = {
@@ -127,5 +133,5 @@ class TruLensOptimizer:
         return {
             'optimal_parameters': optimal_params,
             'best_score': best_result['overall_score'],
-            'improvement': float(best_result['overall_score'] - np.mean(scores))
+            'improvement': float(best_result['overall_score'] - total / len(evaluation_results))
         }
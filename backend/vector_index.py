@@ -0,0 +1,146 @@
+from typing import List, Tuple
+import threading
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; try hnswlib, then exact NumPy search
+    faiss = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    import simsimd
+except ImportError:  # simsimd is optional; NumPy's BLAS matmul is the fallback
+    simsimd = None
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place, leaving all-zero rows as zeros"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def inner_products(queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Return the (queries x rows) matrix of inner products"""
+    if simsimd is not None and queries.size and matrix.size:
+        # Runtime-dispatched AVX-512 / NEON (VNNI for int8) dot-product kernels
+        return np.asarray(simsimd.cdist(queries, matrix, metric='dot'), dtype=np.float32)
+    if queries.dtype == np.int8:
+        # int8 products would overflow; float32 sums them exactly at this size
+        return queries.astype(np.float32) @ matrix.astype(np.float32).T
+    return queries @ matrix.T
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize rows to int8 with one symmetric scale per row"""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0)
+    return np.round(matrix / safe[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return per-row indices of the top_k highest scores, best first"""
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        # Partial selection is O(N); only the k survivors get sorted
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+class VectorIndex:
+    """In-memory inner-product index over unit-length embeddings"""
+    
+    # HNSW graph degree and search/construction breadth
+    HNSW_M = 32
+    EF_CONSTRUCTION = 200
+    EF_SEARCH = 64
+    
+    def __init__(self, dim: int, backend: str = None):
+        self.dim = dim
+        self.backend = backend or ('faiss' if faiss is not None else 'hnswlib' if hnswlib is not None else 'numpy')
+        self._ids = []
+        self._lock = threading.Lock()
+        
+        if self.backend == 'faiss':
+            self._index = faiss.IndexHNSWFlat(dim, self.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self._index.hnsw.efConstruction = self.EF_CONSTRUCTION
+            self._index.hnsw.efSearch = self.EF_SEARCH
+        elif self.backend == 'hnswlib':
+            self._index = hnswlib.Index(space='ip', dim=dim)
+            self._index.init_index(max_elements=1024, ef_construction=self.EF_CONSTRUCTION, M=self.HNSW_M)
+            self._index.set_ef(self.EF_SEARCH)
+        else:
+            # Exact search over a buffer that doubles when full; 'int8' keeps
+            # a quarter of the bytes with one scale per row
+            dtype = np.int8 if self.backend == 'int8' else np.float32
+            self._matrix = np.empty((1024, dim), dtype=dtype)
+            self._scales = np.empty(1024, dtype=np.float32) if self.backend == 'int8' else None
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def add(self, ids: List[str], embeddings: np.ndarray):
+        """Add unit-length embeddings under the given article IDs"""
+        vectors = np.ascontiguousarray(np.atleast_2d(embeddings), dtype=np.float32)
+        if not len(ids):
+            return
+        
+        with self._lock:
+            start = len(self._ids)
+            end = start + len(ids)
+            if self.backend == 'faiss':
+                self._index.add(vectors)
+            elif self.backend == 'hnswlib':
+                if end > self._index.get_max_elements():
+                    self._index.resize_index(max(end, 2 * self._index.get_max_elements()))
+                self._index.add_items(vectors, np.arange(start, end))
+            else:
+                if end > self._matrix.shape[0]:
+                    capacity = max(end, 2 * self._matrix.shape[0])
+                    grown = np.empty((capacity, self.dim), dtype=self._matrix.dtype)
+                    grown[:start] = self._matrix[:start]
+                    self._matrix = grown
+                    if self._scales is not None:
+                        scales = np.empty(capacity, dtype=np.float32)
+                        scales[:start] = self._scales[:start]
+                        self._scales = scales
+                if self.backend == 'int8':
+                    self._matrix[start:end], self._scales[start:end] = quantize_int8(vectors)
+                else:
+                    self._matrix[start:end] = vectors
+            self._ids.extend(ids)
+    
+    def search(self, queries: np.ndarray, top_k: int) -> List[List[Tuple[str, float]]]:
+        """Return (article_id, inner product) pairs for each unit-length query, best first"""
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        
+        with self._lock:
+            count = len(self._ids)
+            k = min(top_k, count)
+            if k <= 0:
+                return [[] for _ in range(queries.shape[0])]
+            
+            if self.backend == 'faiss':
+                scores, labels = self._index.search(queries, k)
+            elif self.backend == 'hnswlib':
+                labels, distances = self._index.knn_query(queries, k=k)
+                scores = 1.0 - distances  # hnswlib 'ip' distance is 1 - <q, x>
+            else:
+                if self.backend == 'int8':
+                    quantized, query_scales = quantize_int8(queries)
+                    all_scores = inner_products(quantized, self._matrix[:count])
+                    all_scores *= query_scales[:, None] * self._scales[None, :count]
+                else:
+                    all_scores = inner_products(queries, self._matrix[:count])
+                labels = top_k_indices(all_scores, k)
+                scores = np.take_along_axis(all_scores, labels, axis=1)
+            
+            return [
+                [(self._ids[label], float(score)) for label, score in zip(row_labels, row_scores) if label >= 0]
+                for row_labels, row_scores in zip(labels, scores)
+            ]
@@ -2,11 +2,18 @@ import streamlit as st
 from dotenv import load_dotenv
 import os
 import sys
-from typing import Dict, List
+import contextlib
+import functools
+import hashlib
+import html
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
-# Add project root to Python path
+# Add project root to Python path; Streamlit re-executes this script on
+# every rerun, so only add it once
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(project_root)
+if project_root not in sys.path:
+    sys.path.append(project_root)
 
 # Load environment variables at startup
 load_dotenv()
@@ -28,42 +35,157 @@ if missing_vars:
 
 # Import after environment validation and path setup
 from backend.search import NewsSearcher
-from backend.bias_analysis import BiasDetector
+from backend.snowflake_integration import SnowflakeManager
+from backend.bias_analysis import get_bias_detector
 from frontend.components.bias_meter import BiasAnalyzer
 from frontend.components.results_display import ResultsDisplay
 
+CUSTOM_CSS = """
+    <style>
+    .main-header {
+        background: linear-gradient(90deg, #4CAF50, #2196F3);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        font-size: 2.5em;
+        font-weight: bold;
+        margin-bottom: 1em;
+        text-align: center;
+    }
+    .subheader {
+        color: #7c7c7c;
+        font-size: 1.2em;
+        margin-bottom: 2em;
+        text-align: center;
+    }
+    .stTextInput > div > div > input {
+        background-color: #2b2b2b;
+        color: white;
+        border-radius: 10px;
+    }
+    .stTextArea > div > div > textarea {
+        background-color: #2b2b2b;
+        color: white;
+        border-radius: 10px;
+    }
+    .insight-box {
+        background-color: rgba(76, 175, 80, 0.1);
+        border-left: 3px solid #4CAF50;
+        padding: 20px;
+        border-radius: 5px;
+        margin: 10px 0;
+    }
+    .source-box {
+        background-color: rgba(33, 150, 243, 0.1);
+        border: 1px solid #2196F3;
+        padding: 15px;
+        border-radius: 10px;
+        margin: 10px 0;
+    }
+    </style>
+"""
+
+# Result card markup, filled with str.format; scraped text is HTML-escaped
+# before it goes in since these are rendered with unsafe_allow_html
+SOURCE_BOX_HTML = (
+    '<div class="source-box">'
+    '<p><strong>🌐 Source:</strong> {domain}</p>'
+    '<p><strong>📈 Relevance Score:</strong> {score:.2f}</p>'
+    '<p>{preview}</p>'
+    '</div>'
+)
+INSIGHT_BOX_HTML = '<div class="insight-box"><p>✨ {insight}</p></div>'
+
 @st.cache_resource
 def initialize_components():
     """Initialize components with caching to prevent multiple initializations"""
     return {
         "searcher": NewsSearcher(),
-        "bias_detector": BiasDetector(),
+        "bias_detector": get_bias_detector(),
         "bias_meter": BiasAnalyzer(),
         "results_display": ResultsDisplay()
     }
 
-def generate_report_pdf(article_data: Dict, bias_results: Dict, related_articles: List[Dict]) -> str:
-    """Generate a PDF report of the analysis"""
+@st.cache_resource
+def get_report_executor() -> ThreadPoolExecutor:
+    """Return the shared worker that builds PDF reports off the render path"""
+    return ThreadPoolExecutor(max_workers=1)
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def run_pipeline(text: str, top_k: int, index_generation: int) -> Tuple[Dict, List[Dict], Dict]:
+    """Find related articles and analyze bias for an article text"""
+    # index_generation only keys the cache, so indexing new articles
+    # retires results computed against the old index
+    components = initialize_components()
+    article_data = {"text": text, "title": text[:50] + "..."}
+    
+    # Search for related articles in the background so the
+    # local sentiment and language analysis overlaps with it
+    with ThreadPoolExecutor(max_workers=1) as search_executor:
+        related_future = search_executor.submit(
+            components["searcher"].find_related,
+            article_data,
+            top_k=top_k
+        )
+        
+        # Analyze bias
+        bias_results = components["bias_detector"].analyze(article_data)
+        related_articles = related_future.result()
+    
+    # Content previews for the result views, sliced once per cached run
+    for article in related_articles:
+        article['preview'] = article.get('metadata', {}).get('content', '')[:500] + "..."
+    
+    return article_data, related_articles, bias_results
+
+@functools.lru_cache(maxsize=1)
+def _report_styles():
+    """Build the report stylesheet once, including the custom title style"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30
+    ))
+    return styles
+
+@functools.lru_cache(maxsize=1)
+def _bias_table_style():
+    """Build the bias table style once"""
     from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def generate_report_pdf(article_data: Dict, bias_results: Dict, related_articles: List[Dict]) -> bytes:
+    """Generate a PDF report of the analysis"""
     from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
     import io
     
     # Create buffer for PDF
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = _report_styles()
     story = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30
-    )
-    story.append(Paragraph("VerifAI Analysis Report", title_style))
+    story.append(Paragraph("VerifAI Analysis Report", styles['CustomTitle']))
     story.append(Spacer(1, 12))
     
     # Article Text
@@ -80,19 +202,7 @@ def generate_report_pdf(article_data: Dict, bias_results: Dict, related_articles
         ["Overall Sentiment", bias_results.get('sentiment', 'neutral')]
     ]
     bias_table = Table(bias_data, colWidths=[200, 300])
-    bias_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    bias_table.setStyle(_bias_table_style())
     story.append(bias_table)
     story.append(Spacer(1, 12))
     
@@ -128,11 +238,76 @@ def save_analysis(article_data: Dict, bias_results: Dict, related_articles: List
         st.error(f"Error saving analysis: {str(e)}")
         return None
 
+def save_analysis_once(article_data: Dict, bias_results: Dict, related_articles: List[Dict], snowflake_manager) -> str:
+    """Save an analysis once per session, reusing its ID for repeat saves and shares"""
+    key = hashlib.blake2b(
+        repr((
+            article_data.get('text', ''),
+            bias_results.get('bias_score'),
+            tuple(article.get('metadata', {}).get('id') for article in related_articles)
+        )).encode(),
+        digest_size=16
+    ).hexdigest()
+    saved = st.session_state.setdefault("saved_analyses", {})
+    if key not in saved:
+        analysis_id = save_analysis(article_data, bias_results, related_articles, snowflake_manager)
+        if not analysis_id:
+            return None
+        saved[key] = analysis_id
+    return saved[key]
+
 def share_results(analysis_id: str) -> str:
     """Generate a shareable link for the analysis"""
     base_url = "https://verifai.app/analysis/"  # Replace with your actual domain
     return f"{base_url}{analysis_id}"
 
+# Fragments (Streamlit >= 1.33) rerun on their own when a widget inside
+# them changes; older releases fall back to a plain function
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+@fragment
+def show_export_options(article_data: Dict, bias_results: Dict, related_articles: List[Dict], report_future, snowflake_manager) -> None:
+    """Show the download, share and save actions for an analysis"""
+    st.markdown("---")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # Only waits if the report is still being built
+        st.download_button(
+            label="📥 Download Report",
+            data=report_future.result(),
+            file_name="VerifAI_Analysis_Report.pdf",
+            mime="application/pdf"
+        )
+    
+    with col2:
+        if st.button("📧 Share Results"):
+            with st.spinner("Generating shareable link..."):
+                # Save analysis and get ID
+                analysis_id = save_analysis_once(
+                    article_data,
+                    bias_results,
+                    related_articles,
+                    snowflake_manager
+                )
+                if analysis_id:
+                    share_link = share_results(analysis_id)
+                    st.success(f"Share this link: {share_link}")
+                    # Add copy button
+                    st.code(share_link, language=None)
+                    
+    with col3:
+        if st.button("💾 Save Analysis"):
+            with st.spinner("Saving analysis..."):
+                analysis_id = save_analysis_once(
+                    article_data,
+                    bias_results,
+                    related_articles,
+                    snowflake_manager
+                )
+                if analysis_id:
+                    st.success(f"Analysis saved successfully! ID: {analysis_id}")
+
 def main():
     st.set_page_config(
         page_title="VerifAI: Media Bias & Fake News Detector",
@@ -141,50 +316,9 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Custom CSS for better styling
-    st.markdown("""
-        <style>
-        .main-header {
-            background: linear-gradient(90deg, #4CAF50, #2196F3);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            font-size: 2.5em;
-            font-weight: bold;
-            margin-bottom: 1em;
-            text-align: center;
-        }
-        .subheader {
-            color: #7c7c7c;
-            font-size: 1.2em;
-            margin-bottom: 2em;
-            text-align: center;
-        }
-        .stTextInput > div > div > input {
-            background-color: #2b2b2b;
-            color: white;
-            border-radius: 10px;
-        }
-        .stTextArea > div > div > textarea {
-            background-color: #2b2b2b;
-            color: white;
-            border-radius: 10px;
-        }
-        .insight-box {
-            background-color: rgba(76, 175, 80, 0.1);
-            border-left: 3px solid #4CAF50;
-            padding: 20px;
-            border-radius: 5px;
-            margin: 10px 0;
-        }
-        .source-box {
-            background-color: rgba(33, 150, 243, 0.1);
-            border: 1px solid #2196F3;
-            padding: 15px;
-            border-radius: 10px;
-            margin: 10px 0;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS for better styling; Streamlit drops elements a rerun
+    # doesn't emit, so it is re-sent every run from a prebuilt string
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
     
     # Sidebar settings
     with st.sidebar:
@@ -247,34 +381,41 @@ def main():
     )
     
     if text:
-        with st.spinner("🔄 Analyzing article..."):
-            article_data = {"text": text, "title": text[:50] + "..."}
-            
-            # Create progress bar
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Update progress
-            status_text.text("Finding related articles...")
-            progress_bar.progress(25)
+        # Reruns over the same input are served from the pipeline cache,
+        # so only show the spinner when the text, depth or index changed
+        index_generation = SnowflakeManager.index_generation
+        input_key = hashlib.blake2b(f"{index_generation}:{search_depth}:{text}".encode(), digest_size=16).hexdigest()
+        analyzed = st.session_state.get("analyzed_input") == input_key
+        with contextlib.nullcontext() if analyzed else st.spinner("🔄 Analyzing article..."):
+            # Create progress bar; cached reruns finish too fast to need one
+            if not analyzed:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                # Update progress
+                status_text.text("Finding related articles...")
+                progress_bar.progress(25)
             
-            # Search for related articles
-            related_articles = components["searcher"].find_related(
-                article_data,
-                top_k=search_depth
+            # Search and analysis; reruns for the same text, depth and index
+            # (slider drags, button clicks) are served from the cache
+            article_data, related_articles, bias_results = run_pipeline(
+                text,
+                search_depth,
+                index_generation
             )
+            st.session_state["analyzed_input"] = input_key
             
-            status_text.text("Analyzing bias and sentiment...")
-            progress_bar.progress(50)
-            
-            # Analyze bias
-            bias_results = components["bias_detector"].analyze(
+            # Build the report in the background while the tabs render
+            report_future = get_report_executor().submit(
+                generate_report_pdf,
                 article_data,
+                bias_results,
                 related_articles
             )
             
-            status_text.text("Generating insights...")
-            progress_bar.progress(75)
+            if not analyzed:
+                status_text.text("Generating insights...")
+                progress_bar.progress(75)
             
             # Create tabs for different result sections
             tabs = st.tabs([
@@ -298,13 +439,11 @@ def main():
                             col1, col2 = st.columns([3, 1])
                             with col1:
                                 st.markdown(
-                                    f"""
-                                    <div class="source-box">
-                                        <p><strong>🌐 Source:</strong> {article.get('metadata', {}).get('domain', 'Unknown')}</p>
-                                        <p><strong>📈 Relevance Score:</strong> {article.get('final_score', 0):.2f}</p>
-                                        <p>{article.get('metadata', {}).get('content', '')[:500]}...</p>
-                                    </div>
-                                    """,
+                                    SOURCE_BOX_HTML.format(
+                                        domain=html.escape(str(article.get('metadata', {}).get('domain', 'Unknown'))),
+                                        score=article.get('final_score', 0),
+                                        preview=html.escape(article.get('preview', ''))
+                                    ),
                                     unsafe_allow_html=True
                                 )
                             with col2:
@@ -325,11 +464,7 @@ def main():
                 insights = bias_results.get('key_findings', [])
                 for insight in insights:
                     st.markdown(
-                        f"""
-                        <div class="insight-box">
-                            <p>✨ {insight}</p>
-                        </div>
-                        """,
+                        INSIGHT_BOX_HTML.format(insight=html.escape(str(insight))),
                         unsafe_allow_html=True
                     )
                 
@@ -348,51 +483,18 @@ def main():
                             )
             
             # Clear progress indicators
-            progress_bar.progress(100)
-            status_text.empty()
-            
-            # Show export options
-            st.markdown("---")
-            col1, col2, col3 = st.columns(3)
+            if not analyzed:
+                progress_bar.progress(100)
+                status_text.empty()
             
-            # Generate report data
-            report_data = generate_report_pdf(article_data, bias_results, related_articles)
-            
-            with col1:
-                st.download_button(
-                    label="📥 Download Report",
-                    data=report_data,
-                    file_name="VerifAI_Analysis_Report.pdf",
-                    mime="application/pdf"
-                )
-            
-            with col2:
-                if st.button("📧 Share Results"):
-                    with st.spinner("Generating shareable link..."):
-                        # Save analysis and get ID
-                        analysis_id = save_analysis(
-                            article_data,
-                            bias_results,
-                            related_articles,
-                            components["searcher"].snowflake
-                        )
-                        if analysis_id:
-                            share_link = share_results(analysis_id)
-                            st.success(f"Share this link: {share_link}")
-                            # Add copy button
-                            st.code(share_link, language=None)
-                            
-            with col3:
-                if st.button("💾 Save Analysis"):
-                    with st.spinner("Saving analysis..."):
-                        analysis_id = save_analysis(
-                            article_data,
-                            bias_results,
-                            related_articles,
-                            components["searcher"].snowflake
-                        )
-                        if analysis_id:
-                            st.success(f"Analysis saved successfully! ID: {analysis_id}")
+            # Show export options; the buttons only rerun this section
+            show_export_options(
+                article_data,
+                bias_results,
+                related_articles,
+                report_future,
+                components["searcher"].snowflake
+            )
 
 if __name__ == "__main__":
     main()
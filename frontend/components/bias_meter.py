@@ -1,6 +1,68 @@
+import bisect
+from typing import Tuple
 import streamlit as st
 import plotly.graph_objects as go
 
+# Upper bounds (inclusive) of each bias band, far left to far right
+_BIAS_THRESHOLDS = (-0.6, -0.2, 0.2, 0.6)
+_BIAS_COLORS = (
+    "rgba(30, 63, 204, 0.9)",  # Deep blue for far left
+    "rgba(86, 119, 252, 0.9)",  # Light blue for left
+    "rgba(128, 128, 128, 0.9)",  # Gray for center
+    "rgba(252, 86, 86, 0.9)",  # Light red for right
+    "rgba(204, 30, 30, 0.9)"  # Deep red for far right
+)
+_BIAS_CATEGORIES = ("Far Left", "Left", "Center", "Right", "Far Right")
+
+# Static gauge layout, shared by every bias meter figure
+_GAUGE_AXIS = {
+    'range': [-100, 100],
+    'tickwidth': 1,
+    'tickcolor': "darkgray",
+    'ticktext': ["Far Left", "Left", "Center", "Right", "Far Right"],
+    'tickvals': [-80, -40, 0, 40, 80]
+}
+_GAUGE_STEPS = [
+    {'range': [-100, -60], 'color': "rgba(30, 63, 204, 0.2)"},
+    {'range': [-60, -20], 'color': "rgba(86, 119, 252, 0.2)"},
+    {'range': [-20, 20], 'color': "rgba(128, 128, 128, 0.2)"},
+    {'range': [20, 60], 'color': "rgba(252, 86, 86, 0.2)"},
+    {'range': [60, 100], 'color': "rgba(204, 30, 30, 0.2)"}
+]
+
+_GAUGE_LAYOUT = {
+    'paper_bgcolor': "white",
+    'font': {'color': "darkgray", 'family': "Arial"}
+}
+_GAUGE_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Held as a shared resource rather than cache_data: a cache_data hit
+# unpickles the figure, which re-runs Plotly's validators on every
+# property; st.plotly_chart only serializes it and never mutates it
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _build_gauge(value: float, color: str) -> go.Figure:
+    """Build the bias gauge figure for a score in percent"""
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = value,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Political Bias", 'font': {'size': 24}},
+        gauge = {
+            'axis': _GAUGE_AXIS,
+            'bar': {'color': color},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': _GAUGE_STEPS,
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': value
+            }
+        }
+    ), layout = _GAUGE_LAYOUT)
+    return fig
+
 class BiasAnalyzer:
     def __init__(self):
         """Initialize the bias analyzer"""
@@ -8,29 +70,16 @@ class BiasAnalyzer:
         
     def _get_bias_color(self, bias_score: float) -> str:
         """Get color based on bias score"""
-        if bias_score <= -0.6:
-            return "rgba(30, 63, 204, 0.9)"  # Deep blue for far left
-        elif bias_score <= -0.2:
-            return "rgba(86, 119, 252, 0.9)"  # Light blue for left
-        elif bias_score <= 0.2:
-            return "rgba(128, 128, 128, 0.9)"  # Gray for center
-        elif bias_score <= 0.6:
-            return "rgba(252, 86, 86, 0.9)"  # Light red for right
-        else:
-            return "rgba(204, 30, 30, 0.9)"  # Deep red for far right
+        return _BIAS_COLORS[bisect.bisect_left(_BIAS_THRESHOLDS, bias_score)]
             
     def _get_bias_category(self, bias_score: float) -> str:
         """Get bias category based on score"""
-        if bias_score <= -0.6:
-            return "Far Left"
-        elif bias_score <= -0.2:
-            return "Left"
-        elif bias_score <= 0.2:
-            return "Center"
-        elif bias_score <= 0.6:
-            return "Right"
-        else:
-            return "Far Right"
+        return _BIAS_CATEGORIES[bisect.bisect_left(_BIAS_THRESHOLDS, bias_score)]
+            
+    def _classify(self, bias_score: float) -> Tuple[str, str, float]:
+        """Get color, category and rounded percentage for a score in one lookup"""
+        band = bisect.bisect_left(_BIAS_THRESHOLDS, bias_score)
+        return _BIAS_COLORS[band], _BIAS_CATEGORIES[band], round(bias_score * 100, 1)
             
     def display_bias_meter(self, bias_score: float):
         """Display bias meter visualization"""
@@ -39,50 +88,16 @@ class BiasAnalyzer:
             bias_score = float(bias_score)
             bias_score = max(-1.0, min(1.0, bias_score))
             
-            # Create gauge chart
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number",
-                value = bias_score * 100,  # Convert to percentage
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "Political Bias", 'font': {'size': 24}},
-                gauge = {
-                    'axis': {
-                        'range': [-100, 100],
-                        'tickwidth': 1,
-                        'tickcolor': "darkgray",
-                        'ticktext': ["Far Left", "Left", "Center", "Right", "Far Right"],
-                        'tickvals': [-80, -40, 0, 40, 80]
-                    },
-                    'bar': {'color': self._get_bias_color(bias_score)},
-                    'bgcolor': "white",
-                    'borderwidth': 2,
-                    'bordercolor': "gray",
-                    'steps': [
-                        {'range': [-100, -60], 'color': "rgba(30, 63, 204, 0.2)"},
-                        {'range': [-60, -20], 'color': "rgba(86, 119, 252, 0.2)"},
-                        {'range': [-20, 20], 'color': "rgba(128, 128, 128, 0.2)"},
-                        {'range': [20, 60], 'color': "rgba(252, 86, 86, 0.2)"},
-                        {'range': [60, 100], 'color': "rgba(204, 30, 30, 0.2)"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': bias_score * 100
-                    }
-                }
-            ))
+            color, category, percent = self._classify(bias_score)
             
-            # Update layout
-            fig.update_layout(
-                paper_bgcolor = "white",
-                font = {'color': "darkgray", 'family': "Arial"}
-            )
+            # Reruns with the same (rounded) score reuse the cached figure
+            fig = _build_gauge(percent, color)
             
-            # Display in Streamlit
-            st.plotly_chart(fig, use_container_width=True)
+            # Display in Streamlit; the gauge has nothing to hover or drag,
+            # so render it static without the mode bar
+            st.plotly_chart(fig, use_container_width=True, config=_GAUGE_CONFIG)
             
             # Display category
-            category = self._get_bias_category(bias_score)
             st.markdown(f"### Political Leaning: {category}")
             
         except Exception as e:
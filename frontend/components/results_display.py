@@ -1,7 +1,14 @@
 import streamlit as st
-import pandas as pd
 from typing import Dict, List
 
+# VADER score keys shown in the sentiment row, in display order
+_SENTIMENT_METRICS = (
+    ("😊 Positive", 'pos'),
+    ("😐 Neutral", 'neu'),
+    ("☹️ Negative", 'neg'),
+    ("📊 Compound", 'compound')
+)
+
 class ResultsDisplay:
     def __init__(self):
         """Initialize the results display component"""
@@ -41,15 +48,8 @@ class ResultsDisplay:
         # Display sentiment analysis details
         st.subheader("🔍 Sentiment Analysis")
         sentiment_scores = bias_results.get('sentiment_scores', {})
-        cols = st.columns(4)
-        with cols[0]:
-            st.metric("😊 Positive", f"{sentiment_scores.get('pos', 0):.2f}")
-        with cols[1]:
-            st.metric("😐 Neutral", f"{sentiment_scores.get('neu', 0):.2f}")
-        with cols[2]:
-            st.metric("☹️ Negative", f"{sentiment_scores.get('neg', 0):.2f}")
-        with cols[3]:
-            st.metric("📊 Compound", f"{sentiment_scores.get('compound', 0):.2f}")
+        for col, (label, key) in zip(st.columns(len(_SENTIMENT_METRICS)), _SENTIMENT_METRICS):
+            col.metric(label, f"{sentiment_scores.get(key, 0):.2f}")
             
         # Display bias indicators
         if bias_results.get('bias_indicators'):
@@ -94,6 +94,6 @@ class ResultsDisplay:
                 with st.expander(article.get('metadata', {}).get('title', 'Related Article')):
                     st.write(f"Source: {article.get('metadata', {}).get('domain', 'Unknown')}")
                     st.write(f"Similarity Score: {article.get('score', 0):.2f}")
-                    st.write(article.get('metadata', {}).get('content', '')[:500] + "...")
+                    st.write(article.get('preview') or article.get('metadata', {}).get('content', '')[:500] + "...")
                     if article.get('metadata', {}).get('url'):
                         st.markdown(f"[Read more]({article['metadata']['url']})")
@@ -0,0 +1,22 @@
+import os
+import sys
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def main():
+    """Export the embedding model to ONNX with int8 dynamic quantization"""
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else os.getenv("VERIFAI_ONNX_MODEL_DIR", "models/minilm-onnx")
+    
+    print(f"Exporting {MODEL_NAME} to ONNX in {output_dir}...")
+    model = SentenceTransformer(MODEL_NAME, backend="onnx")
+    model.save(output_dir)
+    
+    # Writes onnx/model_qint8_avx512_vnni.onnx next to the fp32 export
+    print("Quantizing to int8 (AVX-512 VNNI)...")
+    export_dynamic_quantized_onnx_model(model, "avx512_vnni", output_dir)
+    
+    print(f"Done. Set VERIFAI_ONNX_MODEL_DIR={output_dir} and VERIFAI_EMBEDDING_PRECISION=onnx-int8 to use it.")
+
+if __name__ == "__main__":
+    main()
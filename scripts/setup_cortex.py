@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import requests
 from datetime import datetime, timedelta
 from newsapi import NewsApiClient
+from newsapi.newsapi_exception import NewsAPIException
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -13,17 +14,84 @@ sys.path.append(str(project_root))
 # Load environment variables
 load_dotenv(project_root / '.env')
 
-from backend.snowflake_integration import SnowflakeManager
-from backend.process import ArticleProcessor
+import hashlib
 import json
 from typing import List, Dict
 import time
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
-def load_sample_articles() -> List[Dict]:
-    """Load real news articles from various sources"""
-    newsapi = NewsApiClient(api_key=os.getenv('NEWS_API_KEY'))
+# Concurrent NewsAPI requests; kept small to stay within rate limits
+FETCH_WORKERS = 4
+
+# Successful NewsAPI responses are kept on disk per (topic, date range) so
+# reruns on the same day don't spend API quota; set it empty to disable
+NEWSAPI_CACHE_DIR = os.getenv("VERIFAI_NEWSAPI_CACHE_DIR", str(project_root / ".newsapi_cache"))
+
+# Retries after NewsAPI reports a rate limit, waiting 1s, 2s, 4s...
+RATE_LIMIT_RETRIES = 3
+
+def get_everything_with_backoff(newsapi: NewsApiClient, params: Dict) -> Dict:
+    """Query NewsAPI, backing off exponentially only when it reports a rate limit"""
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            return newsapi.get_everything(**params)
+        except NewsAPIException as e:
+            if e.get_exception().get('code') != 'rateLimited' or attempt == RATE_LIMIT_RETRIES:
+                raise
+            time.sleep(2 ** attempt)
+
+def fetch_topic_articles(newsapi: NewsApiClient, topic: str, start_date: datetime, end_date: datetime) -> List[Dict]:
+    """Fetch articles with content for one topic from NewsAPI"""
     articles = []
+    try:
+        params = dict(
+            q=topic,
+            from_param=start_date.strftime('%Y-%m-%d'),
+            to=end_date.strftime('%Y-%m-%d'),
+            language='en',
+            sort_by='relevancy',
+            page_size=5  # 5 articles per topic
+        )
+        
+        cache_path = None
+        if NEWSAPI_CACHE_DIR:
+            key = hashlib.blake2b(json.dumps(params, sort_keys=True).encode(), digest_size=16).hexdigest()
+            cache_path = Path(NEWSAPI_CACHE_DIR) / f"{key}.json"
+        
+        if cache_path is not None and cache_path.exists():
+            response = json.loads(cache_path.read_text(encoding='utf-8'))
+        else:
+            response = get_everything_with_backoff(newsapi, params)
+            if cache_path is not None and response['status'] == 'ok':
+                # Write then rename so an interrupted run leaves no partial file
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                partial_path = cache_path.with_suffix('.tmp')
+                partial_path.write_text(json.dumps(response), encoding='utf-8')
+                partial_path.replace(cache_path)
+        
+        if response['status'] == 'ok':
+            for article in response['articles']:
+                # Skip articles without content
+                if not article['content'] or not article['title']:
+                    continue
+                    
+                articles.append({
+                    "url": article['url'],
+                    "title": article['title'],
+                    "text": f"{article['description'] or ''} {article['content']}".strip(),
+                    "domain": article['source']['name'],
+                    "published_date": article['publishedAt']
+                })
+        
+    except Exception as e:
+        print(f"Error fetching articles for topic '{topic}': {str(e)}")
+    
+    return articles
+
+def load_sample_articles(api_key: str = None) -> List[Dict]:
+    """Load real news articles from various sources"""
+    newsapi = NewsApiClient(api_key=api_key or os.getenv('NEWS_API_KEY'))
     
     # Topics to fetch articles about
     topics = [
@@ -41,38 +109,23 @@ def load_sample_articles() -> List[Dict]:
     end_date = datetime.now()
     start_date = end_date - timedelta(days=7)
     
+    # Topics are fetched a few at a time; results keep topic order
     print("Fetching articles from NewsAPI...")
-    for topic in tqdm(topics, desc="Topics"):
-        try:
-            response = newsapi.get_everything(
-                q=topic,
-                from_param=start_date.strftime('%Y-%m-%d'),
-                to=end_date.strftime('%Y-%m-%d'),
-                language='en',
-                sort_by='relevancy',
-                page_size=5  # 5 articles per topic
-            )
-            
-            if response['status'] == 'ok':
-                for article in response['articles']:
-                    # Skip articles without content
-                    if not article['content'] or not article['title']:
-                        continue
-                        
-                    articles.append({
-                        "url": article['url'],
-                        "title": article['title'],
-                        "text": f"{article['description']} {article['content']}",
-                        "domain": article['source']['name'],
-                        "published_date": article['publishedAt']
-                    })
-            
-            # Rate limiting
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error fetching articles for topic '{topic}': {str(e)}")
-            continue
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        results = executor.map(
+            lambda topic: fetch_topic_articles(newsapi, topic, start_date, end_date),
+            topics
+        )
+        
+        # Topics often return the same story; keep the first copy of each URL
+        articles = []
+        seen_urls = set()
+        for topic_articles in tqdm(results, total=len(topics), desc="Topics"):
+            for article in topic_articles:
+                if article["url"] in seen_urls:
+                    continue
+                seen_urls.add(article["url"])
+                articles.append(article)
     
     print(f"Fetched {len(articles)} articles from {len(topics)} topics")
     return articles
@@ -97,8 +150,20 @@ def main():
             print(f"- {var}")
         sys.exit(1)
     
+    # Import after environment validation so a misconfigured run exits
+    # before loading the Snowflake connector, NumPy and NLTK
+    from backend.snowflake_integration import SnowflakeManager
+    from backend.process import ArticleProcessor
+    
     # Initialize components
     try:
+        # Fetch articles in the background while Snowflake connects and
+        # the tables are created; the worker exits once the fetch is done
+        print("Loading articles from news sources...")
+        fetch_executor = ThreadPoolExecutor(max_workers=1)
+        articles_future = fetch_executor.submit(load_sample_articles, os.getenv('NEWS_API_KEY'))
+        fetch_executor.shutdown(wait=False)
+        
         snowflake = SnowflakeManager()
         processor = ArticleProcessor()
         
@@ -107,36 +172,51 @@ def main():
         snowflake.setup_tables()
         
         # Load and process articles
-        print("Loading articles from news sources...")
-        articles = load_sample_articles()
+        articles = articles_future.result()
         
         if not articles:
             print("Error: No articles were fetched. Check your NEWS_API_KEY and internet connection.")
             sys.exit(1)
         
-        # Index articles
+        # Process articles
         print("Indexing articles...")
-        for article in tqdm(articles, desc="Indexing"):
+        processed_articles = []
+        for article in tqdm(articles, desc="Processing"):
             try:
                 # Process article
                 processed_article = processor.process_text(article["text"])
                 processed_article["url"] = article["url"]
                 processed_article["title"] = article["title"]
                 processed_article["domain"] = article["domain"]
-                
-                # Index in Snowflake
-                doc_id = snowflake.index_article(processed_article)
-                print(f"Indexed article: {article['title'][:60]}... [ID: {doc_id}]")
-                
-                # Rate limiting
-                time.sleep(0.5)
+                processed_articles.append(processed_article)
                 
             except Exception as e:
                 print(f"Error processing article '{article['title'][:30]}...': {str(e)}")
                 continue
         
+        # Index in Snowflake with one batched encode and insert
+        try:
+            indexed = list(zip(processed_articles, snowflake.index_articles(processed_articles)))
+        except Exception as e:
+            # The batch commits all or nothing; retry one article at a time
+            # so a single bad row doesn't cost the whole run
+            print(f"Error indexing batch, retrying articles one by one: {str(e)}")
+            indexed = []
+            for processed_article in tqdm(processed_articles, desc="Indexing"):
+                try:
+                    indexed.append((processed_article, snowflake.index_article(processed_article)))
+                except Exception as e:
+                    print(f"Error indexing article '{processed_article['title'][:30]}...': {str(e)}")
+                    continue
+        
+        if indexed:
+            print("\n".join(
+                f"Indexed article: {processed_article['title'][:60]}... [ID: {doc_id}]"
+                for processed_article, doc_id in indexed
+            ))
+        
         print("\nSetup completed successfully!")
-        print(f"Indexed {len(articles)} articles from various news sources")
+        print(f"Indexed {len(indexed)} articles from various news sources")
         
     except Exception as e:
         print(f"Error during setup: {str(e)}")
@@ -1,5 +1,7 @@
 import nltk
 import ssl
+from concurrent.futures import ThreadPoolExecutor
+from nltk.downloader import Downloader
 
 try:
     _create_unverified_https_context = ssl._create_unverified_context
@@ -8,9 +10,30 @@ except AttributeError:
 else:
     ssl._create_default_https_context = _create_unverified_https_context
 
+# Package name and the data path that shows it is already installed
+RESOURCES = [
+    ('punkt', 'tokenizers/punkt'),
+    ('punkt_tab', 'tokenizers/punkt_tab'),
+    ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger'),
+    ('wordnet', 'corpora/wordnet')
+]
+
+def download(package: str, resource: str) -> bool:
+    """Download one NLTK package unless it is already installed"""
+    try:
+        nltk.data.find(resource)
+        print(f"{package} already installed")
+        return True
+    except LookupError:
+        # A Downloader per call; the shared module-level one isn't thread-safe
+        return Downloader().download(package, quiet=True)
+
 print("Downloading required NLTK resources...")
-nltk.download('punkt')
-nltk.download('punkt_tab')
-nltk.download('averaged_perceptron_tagger')
-nltk.download('wordnet')
-print("NLTK resources downloaded successfully!") 
\ No newline at end of file
+with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+    results = list(executor.map(lambda item: download(*item), RESOURCES))
+
+failed = [package for (package, _), ok in zip(RESOURCES, results) if not ok]
+if failed:
+    print(f"Failed to download: {', '.join(failed)}")
+else:
+    print("NLTK resources downloaded successfully!") 
\ No newline at end of file
@@ -13,6 +13,17 @@ try:
         user=os.getenv('SNOWFLAKE_USER'),
         password=os.getenv('SNOWFLAKE_PASSWORD'),
         role=os.getenv('SNOWFLAKE_ROLE'),
+        # Fail fast instead of waiting out the default login retries; the
+        # network timeout bounds socket reads, the statement timeout the query
+        login_timeout=10,
+        network_timeout=10,
+        # A one-statement probe has nothing to commit or report
+        autocommit=True,
+        session_parameters={
+            'QUERY_TAG': 'verifai-healthcheck',
+            'STATEMENT_TIMEOUT_IN_SECONDS': 10,
+            'CLIENT_TELEMETRY_ENABLED': False,
+        },
     )
     
     # Test query